@@ -1,3 +1,8 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 
 
@@ -18,3 +23,100 @@ class Pagination(PageNumberPagination):
             elif page_size == 0:
                 return None
         return self.page_size
+
+
+class KeysetPage:
+    def __init__(self, rows, next_cursor, previous_cursor, count=None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    @property
+    def data(self):
+        data = {"next": self.next_cursor, "previous": self.previous_cursor}
+        if self.count is not None:
+            data["count"] = self.count
+        return data
+
+
+class KeysetPagination(Pagination):
+    """
+    Opt-in cursor pagination, enabled by a `cursor` query parameter (empty
+    for the first page).
+
+    Pages are read with a WHERE on the ordering key instead of OFFSET, so a
+    deep page costs the same as the first one, and COUNT(*) only runs when
+    the client passes `count=true`. `ordering` must end in a unique field.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+    def is_requested(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate(self, queryset, request):
+        page_size = self.get_page_size(request) or self.max_page_size
+        values, reverse = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+
+        ordering = [self.flip(field) for field in self.ordering] if reverse else self.ordering
+        rows = queryset.order_by(*ordering)
+        if values is not None:
+            rows = rows.filter(self.after(ordering, values))
+        rows = list(rows[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Walking backwards, `has_more` is about the rows before this page.
+        more_after = values is not None if reverse else has_more
+        more_before = has_more if reverse else values is not None
+        next_cursor = previous_cursor = None
+        if rows and more_after:
+            next_cursor = self.encode_cursor(rows[-1], reverse=False)
+        if rows and more_before:
+            previous_cursor = self.encode_cursor(rows[0], reverse=True)
+
+        count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            count = queryset.count()
+        return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def after(ordering, values):
+        """Rows strictly after `values` in `ordering`, as an OR of prefix matches."""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {ordering[j].lstrip("-"): values[j] for j in range(i)}
+            condition |= Q(**equal, **{f"{name}__{lookup}": values[i]})
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        values = [getattr(row, field.lstrip("-")) for field in self.ordering]
+        # str() keeps full datetime precision; DjangoJSONEncoder drops microseconds.
+        payload = json.dumps([values, reverse], default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            values, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound("Invalid cursor.")
+        return values, bool(reverse)
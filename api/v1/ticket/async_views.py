@@ -0,0 +1,95 @@
+"""
+Async variants of the endpoints that proxy the Celestia LCD.
+
+Served under uvicorn (config/asgi.py, see start_asgi.sh) a request waiting on
+a slow LCD does not hold a worker thread. Responses match the APIView
+versions in views.py.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from latam_nodes.base.chain import aget_account, aget_validator_delegation
+from latam_nodes.ticket.models import Jackpot, Participant
+
+logger = logging.getLogger(__name__)
+
+
+def json_response(data, status=200):
+    # Rendered like DRF's JSONRenderer so both variants return the same bytes.
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=JSONEncoder,
+        safe=False,
+        json_dumps_params={"separators": (",", ":"), "ensure_ascii": False},
+    )
+
+
+async def check_address(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    address = request.GET.get("address")
+    if not address:
+        return json_response({"error": "Address parameter is required."}, status=400)
+
+    try:
+        data = await aget_account(address)
+        account_responses = data.get("account", {})
+
+        if not account_responses:
+            error_code = data.get("code")
+            if error_code == 2:
+                return json_response(
+                    {
+                        "error": "Address is not validated address. Please check address again"
+                    },
+                    status=400,
+                )
+
+    except Exception:
+        logger.exception("Could not check account %s", address)
+        return json_response(
+            {"error": "Address is not validated address. Please check address again"},
+            status=400,
+        )
+
+    return json_response(account_responses)
+
+
+async def participant_statistics(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    address = request.GET.get("address")
+    if not address:
+        return json_response({"error": "Address parameter is required."}, status=400)
+
+    participant = await sync_to_async(
+        Participant.objects.filter(address=address).first
+    )()
+    if not participant:
+        return json_response({"error": "Participant not found."}, status=404)
+
+    latest_jackpot = await sync_to_async(Jackpot.objects.order_by("-draw_date").first)()
+    ticket_cost = latest_jackpot.ticket_cost if latest_jackpot else 0
+
+    # get current delegation
+    try:
+        data = await aget_validator_delegation(address)
+        current_balance = float(data["delegation_response"]["delegation"]["shares"]) / 1e6
+    except Exception:
+        logger.exception("Could not fetch the delegation of %s", address)
+        current_balance = participant.balance
+
+    return json_response(
+        {
+            "balance": participant.balance,
+            "ticket_cost": ticket_cost,
+            "total_tickets": participant.ticket_count,
+            "current_balance": current_balance,
+        }
+    )
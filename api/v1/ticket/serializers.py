@@ -1,6 +1,12 @@
 from rest_framework import serializers
 
-from latam_nodes.ticket.models import Jackpot, Participant, Ticket, Winner
+from latam_nodes.ticket.models import (
+    Jackpot,
+    Participant,
+    RoundAllocation,
+    Ticket,
+    Winner,
+)
 
 
 class WinnerTicketSerializer(serializers.ModelSerializer):
@@ -32,6 +38,16 @@ class WinnerSerializer(serializers.ModelSerializer):
         return obj.closest_block_hash_date
 
 
+class RoundAllocationSerializer(serializers.ModelSerializer):
+    jackpot = JackpotSerializer(read_only=True)
+    # Annotated by the view.
+    is_winner = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = RoundAllocation
+        fields = ["jackpot", "ticket_count", "digits", "is_winner"]
+
+
 class ParticipantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Participant
@@ -43,3 +59,10 @@ class ParticipantSerializer(serializers.ModelSerializer):
             defaults={"balance": validated_data.get("balance", 0)},
         )
         return instance
+
+    def update(self, instance, validated_data):
+        # Only write the submitted fields; ticket_count is maintained in SQL.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
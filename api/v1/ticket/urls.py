@@ -1,15 +1,18 @@
 from django.urls import path
 from rest_framework import routers
 
+from api.v1.ticket import async_views
 from api.v1.ticket.views import (
     CheckAddressView,
     CheckAndUpdateAddress,
     JackpotCountdownView,
     ParticipantStatisticsView,
     RecentJackpotList,
+    RoundsByAddressView,
     SummaryView,
     TicketsByAddressView,
     TopWinnersList,
+    UpstreamCacheStatsView,
     WinnerByAddressView,
 )
 
@@ -35,6 +38,24 @@ urlpatterns = [
     path(
         "winners-by-address/", WinnerByAddressView.as_view(), name="winners-by-address"
     ),
+    path(
+        "rounds-by-address/", RoundsByAddressView.as_view(), name="rounds-by-address"
+    ),
     path("check-address/", CheckAddressView.as_view(), name="check-address"),
+    path(
+        "async/check-address/",
+        async_views.check_address,
+        name="check-address-async",
+    ),
+    path(
+        "async/participant-statistics/",
+        async_views.participant_statistics,
+        name="participant-statistics-async",
+    ),
     path("recent-jackpots/", RecentJackpotList.as_view(), name="recent-jackpots"),
+    path(
+        "upstream-cache-stats/",
+        UpstreamCacheStatsView.as_view(),
+        name="upstream-cache-stats",
+    ),
 ]
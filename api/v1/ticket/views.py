@@ -1,20 +1,41 @@
+from django.conf import settings
 from django.core.paginator import Paginator
-from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Exists, OuterRef, Sum
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from requests.sessions import Session
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.status import HTTP_503_SERVICE_UNAVAILABLE
 from rest_framework.views import APIView
 
+from latam_nodes.base.chain import (
+    get_account,
+    get_delegations,
+    get_validator_delegation,
+    lcd_cache,
+)
 from latam_nodes.delegator.models import Delegator
-from latam_nodes.ticket.models import Jackpot, Participant, Ticket, Winner
-
-from ...base.pagination import Pagination
-from .serializers import ParticipantSerializer, WinnerSerializer
+from latam_nodes.ticket.models import (
+    Jackpot,
+    Participant,
+    RoundAllocation,
+    Ticket,
+    Winner,
+)
+from latam_nodes.ticket.round_state import get_round_state
+from latam_nodes.ticket.utils import (
+    claim_round_tickets,
+    encode_ticket_bitmap,
+    encode_ticket_ranges,
+)
+
+from ...base.pagination import KeysetPagination, Pagination
+from .serializers import (
+    ParticipantSerializer,
+    RoundAllocationSerializer,
+    WinnerSerializer,
+)
 
 
 class TopWinnersList(ListAPIView):
@@ -33,10 +54,10 @@ class CheckAndUpdateAddress(APIView):
         
         try:
             # Get the most recent jackpot to determine ticket cost
-            latest_jackpot = (
-                Jackpot.objects.order_by("-draw_date").filter(is_active=True).first()
-            )
-            if not latest_jackpot or latest_jackpot.ticket_cost is None:
+            round_state = get_round_state()
+            latest_jackpot = round_state.jackpot
+            # Also refused while setup_jackpot_round is still dealing the tickets.
+            if not round_state.is_open or latest_jackpot.ticket_cost is None:
                 return Response(
                     {
                         "message": "There is currently no available jackpot, but you can participate in the lottery once the jackpot is set."
@@ -60,11 +81,12 @@ class CheckAndUpdateAddress(APIView):
                     status=403,
                 )
 
-            total_available_ticket_count = Ticket.objects.count() * latest_jackpot.winning_percentage // 100
-            selected_ticket_count = Ticket.objects.filter(address__isnull=False).count()
-            max_tickets = min(total_available_ticket_count - selected_ticket_count, max_tickets)
-            
-            selected_tickets_by_address = Ticket.objects.filter(address=address).count()
+            selected_tickets_by_address = (
+                Participant.objects.filter(address=address)
+                .values_list("ticket_count", flat=True)
+                .first()
+                or 0
+            )
             max_tickets = max(max_tickets - selected_tickets_by_address, 0)
             
             if latest_jackpot.distributed_status and selected_tickets_by_address == 0:
@@ -88,7 +110,7 @@ class CheckAndUpdateAddress(APIView):
             if created or not participant.is_active:
                 participant.is_active = True
                 participant.balance = delegator.balance
-                participant.save()
+                participant.save(update_fields=["is_active", "balance", "updated_at"])
                 self.assign_tickets(participant, max_tickets)
 
             serializer = ParticipantSerializer(
@@ -101,38 +123,35 @@ class CheckAndUpdateAddress(APIView):
             return Response(serializer.errors, status=400)
         
         except Delegator.DoesNotExist:
-            with Session() as session:
-                try:
-                    url = f"https://api-celestia.mzonder.com/cosmos/staking/v1beta1/delegations/{address}"
-                    response = session.get(url)
-                    data = response.json()
-                    delegation_responses = data.get("delegation_responses", [])
-                    filtered_delegations = [
-                        delegation
-                        for delegation in delegation_responses
-                        if delegation["delegation"]["validator_address"]
-                        != "celestiavaloper14v4ush42xewyeuuldf6jtdz0a7pxg5fwrlumwf"
-                    ]
-
-                    total_balance = (
-                        sum(
-                            float(delegation["balance"]["amount"])
-                            for delegation in filtered_delegations
-                            if delegation["balance"]["denom"] == "utia"
-                        )
-                        / 1e6
+            try:
+                data = get_delegations(address)
+                delegation_responses = data.get("delegation_responses", [])
+                filtered_delegations = [
+                    delegation
+                    for delegation in delegation_responses
+                    if delegation["delegation"]["validator_address"]
+                    != settings.VALIDATOR_ADDRESS
+                ]
+
+                total_balance = (
+                    sum(
+                        float(delegation["balance"]["amount"])
+                        for delegation in filtered_delegations
+                        if delegation["balance"]["denom"] == "utia"
                     )
+                    / 1e6
+                )
 
-                    if total_balance > 0:
-                        return Response(
-                            {
-                                "message": f"You staked {total_balance} tia with other nodes, not Latam Nodes. If you redelegate with us, you can participate in the lottery after one week"
-                            },
-                            status=403,
-                        )
+                if total_balance > 0:
+                    return Response(
+                        {
+                            "message": f"You staked {total_balance} tia with other nodes, not Latam Nodes. If you redelegate with us, you can participate in the lottery after one week"
+                        },
+                        status=403,
+                    )
 
-                except Exception as e:
-                    print(e)
+            except Exception as e:
+                print(e)
 
             return Response(
                 {
@@ -141,33 +160,8 @@ class CheckAndUpdateAddress(APIView):
                 status=403,
             )
             
-    @transaction.atomic
     def assign_tickets(self, participant, max_tickets):
-        # Acquire a lock on the rows to be updated
-        available_tickets = (
-            Ticket.objects.filter(address__isnull=True)
-            .order_by("?")
-            .select_for_update(skip_locked=True)[:max_tickets]
-        )
-
-        if len(available_tickets) < max_tickets:
-            return Response(
-                {"message": "Not enough tickets available to assign"}, status=400
-            )
-
-        batch_size = 1000
-        tickets = []
-
-        # Assign tickets to the participant
-        for ticket in available_tickets:
-            ticket.address = participant
-            tickets.append(ticket)
-            if len(tickets) == batch_size:
-                Ticket.objects.bulk_update(tickets, ["address"])
-                tickets = []
-        if tickets:
-            # update ticket when tickets remain
-            Ticket.objects.bulk_update(tickets, ["address"])
+        return claim_round_tickets(participant, int(max_tickets))
 
 
 class SummaryView(APIView):
@@ -178,23 +172,26 @@ class SummaryView(APIView):
         data = {}
 
         # Get the latest jackpot
-        latest_jackpot = (
-            Jackpot.objects.order_by("-draw_date").filter(is_active=True).first()
-        )
-        if latest_jackpot:
+        round_state = get_round_state()
+        latest_jackpot = round_state.jackpot
+        # The reward is only known once setup_jackpot_round has run.
+        if round_state.is_open and latest_jackpot.reward is not None:
             data["latest_jackpot_amount"] = (
                 latest_jackpot.reward * latest_jackpot.reward_percentage / 100
             )
         else:
             data["latest_jackpot_amount"] = "No jackpot available"
 
-        data["total_tickets"] = Ticket.objects.count() * latest_jackpot.winning_percentage // 100
+        data["total_tickets"] = round_state.ticket_capacity
 
         # Get tickets count for a specific participant
         if address:
-            participant_tickets = Ticket.objects.filter(
-                address__address=address
-            ).count()
+            participant_tickets = (
+                Participant.objects.filter(address=address)
+                .values_list("ticket_count", flat=True)
+                .first()
+                or 0
+            )
             data["participant_tickets"] = participant_tickets
         else:
             data["participant_tickets"] = "Address not provided"
@@ -206,9 +203,7 @@ class JackpotCountdownView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        latest_jackpot = (
-            Jackpot.objects.order_by("-draw_date").filter(is_active=True).first()
-        )
+        latest_jackpot = get_round_state().jackpot
         if latest_jackpot:
             # Assuming `draw_date` is in UTC and stored as such in the database.
             now_utc = timezone.now()
@@ -241,20 +236,17 @@ class ParticipantStatisticsView(APIView):
 
         latest_jackpot = Jackpot.objects.order_by("-draw_date").first()
         ticket_cost = latest_jackpot.ticket_cost if latest_jackpot else 0
-        total_tickets = Ticket.objects.filter(address=participant).count()
+        total_tickets = participant.ticket_count
 
         # get current delegation
-        with Session() as session:
-            try:
-                url = f"https://api-celestia.mzonder.com/cosmos/staking/v1beta1/validators/celestiavaloper14v4ush42xewyeuuldf6jtdz0a7pxg5fwrlumwf/delegations/{address}"
-                response = session.get(url)
-                data = response.json()
-                current_balance = (
-                    float(data["delegation_response"]["delegation"]["shares"]) / 1e6
-                )
-            except Exception as e:
-                print(e)
-                current_balance = participant.balance
+        try:
+            data = get_validator_delegation(address)
+            current_balance = (
+                float(data["delegation_response"]["delegation"]["shares"]) / 1e6
+            )
+        except Exception as e:
+            print(e)
+            current_balance = participant.balance
 
         return Response(
             {
@@ -269,6 +261,7 @@ class ParticipantStatisticsView(APIView):
 class TicketsByAddressView(APIView):
     permission_classes = [AllowAny]
     pagination_class = Pagination()  # Use the existing pagination class
+    keyset_pagination_class = KeysetPagination(ordering=["hash"])
 
     def get(self, request):
         address = request.query_params.get("address")
@@ -276,6 +269,21 @@ class TicketsByAddressView(APIView):
             return Response({"error": "Address parameter is required."}, status=400)
 
         tickets = Ticket.objects.filter(address__address=address).order_by("hash")
+        compact = request.query_params.get("compact")
+        if compact:
+            return self.get_compact(tickets, compact)
+
+        if self.keyset_pagination_class.is_requested(request):
+            page = self.keyset_pagination_class.paginate(tickets.only("hash"), request)
+            if page.rows:
+                return Response(
+                    {"tickets": [ticket.hash for ticket in page.rows], **page.data}
+                )
+            return Response(
+                {"error": "No tickets found for this address or invalid address."},
+                status=404,
+            )
+
         paginator = Paginator(
             tickets, self.pagination_class.get_page_size(request)
         )  # Use DRF to handle page size
@@ -302,19 +310,60 @@ class TicketsByAddressView(APIView):
             status=404,
         )
 
+    def get_compact(self, tickets, compact):
+        """
+        Return every ticket of the address in one response.
+
+        `compact=bitmap` is a base64 bitmap over the 16**digits hash space
+        (digits being the width of the round's ticket hashes),
+        `compact=ranges` a list of [start, length] runs of ticket values.
+        """
+        if compact not in ("bitmap", "ranges"):
+            return Response(
+                {"error": "compact must be 'bitmap' or 'ranges'."}, status=400
+            )
+
+        hashes = list(tickets.values_list("hash", flat=True))
+        if not hashes:
+            return Response(
+                {"error": "No tickets found for this address or invalid address."},
+                status=404,
+            )
+
+        digits = len(hashes[0])
+        data = {"format": compact, "digits": digits, "count": len(hashes)}
+        if compact == "bitmap":
+            data["bitmap"] = encode_ticket_bitmap(hashes, digits)
+        else:
+            data["ranges"] = encode_ticket_ranges(hashes)
+        return Response(data)
+
 
 class WinnerByAddressView(APIView):
     permission_classes = [AllowAny]
     pagination_class = Pagination()  # Use the existing pagination class
+    keyset_pagination_class = KeysetPagination(ordering=["-created_at", "-id"])
 
     def get(self, request):
         address = request.query_params.get("address")
         if not address:
             return Response({"error": "Address parameter is required."}, status=400)
 
-        winner_list = Winner.objects.filter(participant_address__isnull=False).order_by(
-            "-created_at"
+        winner_list = (
+            Winner.objects.filter(participant_address=address)
+            .select_related("jackpot")
+            .order_by("-created_at", "-id")
         )
+        if self.keyset_pagination_class.is_requested(request):
+            page = self.keyset_pagination_class.paginate(winner_list, request)
+            serializer = WinnerSerializer(page.rows, many=True)
+            return Response(
+                {
+                    "winners": [{**data, "is_winner": True} for data in serializer.data],
+                    **page.data,
+                }
+            )
+
         paginator = Paginator(
             winner_list, self.pagination_class.get_page_size(request)
         )  # Use DRF to handle page size
@@ -324,10 +373,7 @@ class WinnerByAddressView(APIView):
         page = paginator.get_page(page_number)
 
         serializer = WinnerSerializer(page.object_list, many=True)
-        response_data = [
-            {**data, "is_winner": data["participant_address"] == address}
-            for data in serializer.data
-        ]
+        response_data = [{**data, "is_winner": True} for data in serializer.data]
 
         response_data = {
             "winners": response_data,
@@ -339,6 +385,54 @@ class WinnerByAddressView(APIView):
         return Response(response_data)
 
 
+class RoundsByAddressView(APIView):
+    """Past rounds of an address, read from the RoundAllocation snapshots."""
+
+    permission_classes = [AllowAny]
+    pagination_class = Pagination()
+    keyset_pagination_class = KeysetPagination(ordering=["-created_at", "-id"])
+
+    def get(self, request):
+        address = request.query_params.get("address")
+        if not address:
+            return Response({"error": "Address parameter is required."}, status=400)
+
+        rounds = (
+            RoundAllocation.objects.filter(participant_address=address)
+            .select_related("jackpot")
+            .annotate(
+                is_winner=Exists(
+                    Winner.objects.filter(
+                        jackpot=OuterRef("jackpot"),
+                        participant_address=OuterRef("participant_address"),
+                    )
+                )
+            )
+            .order_by("-created_at", "-id")
+        )
+        if self.keyset_pagination_class.is_requested(request):
+            page = self.keyset_pagination_class.paginate(rounds, request)
+            serializer = RoundAllocationSerializer(page.rows, many=True)
+            return Response({"rounds": serializer.data, **page.data})
+
+        paginator = Paginator(rounds, self.pagination_class.get_page_size(request))
+        page = paginator.get_page(
+            request.query_params.get(self.pagination_class.page_query_param, 1)
+        )
+        serializer = RoundAllocationSerializer(page.object_list, many=True)
+        return Response(
+            {
+                "rounds": serializer.data,
+                "count": paginator.count,
+                "total_pages": paginator.num_pages,
+                "next": page.next_page_number() if page.has_next() else None,
+                "previous": (
+                    page.previous_page_number() if page.has_previous() else None
+                ),
+            }
+        )
+
+
 class CheckAddressView(APIView):
     permission_classes = [AllowAny]
 
@@ -347,43 +441,53 @@ class CheckAddressView(APIView):
         if not address:
             return Response({"error": "Address parameter is required."}, status=400)
 
-        with Session() as session:
-            try:
-                url = f"https://api-celestia.mzonder.com/cosmos/auth/v1beta1/accounts/{address}"
-                response = session.get(url)
-                data = response.json()
-                account_responses = data.get("account", {})
-
-                if not account_responses:
-                    error_code = data.get("code")
-                    if error_code == 2:
-                        return Response(
-                            {
-                                "error": "Address is not validated address. Please check address again"
-                            },
-                            status=400,
-                        )
+        try:
+            data = get_account(address)
+            account_responses = data.get("account", {})
+
+            if not account_responses:
+                error_code = data.get("code")
+                if error_code == 2:
+                    return Response(
+                        {
+                            "error": "Address is not validated address. Please check address again"
+                        },
+                        status=400,
+                    )
 
-            except Exception as e:
-                print(e)
-                return Response(
-                    {
-                        "error": "Address is not validated address. Please check address again"
-                    },
-                    status=400,
-                )
+        except Exception as e:
+            print(e)
+            return Response(
+                {
+                    "error": "Address is not validated address. Please check address again"
+                },
+                status=400,
+            )
 
         return Response(account_responses, status=200)
 
 
+class UpstreamCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(lcd_cache.stats())
+
+
 class RecentJackpotList(APIView):
     permission_classes = (AllowAny,)
     pagination_class = Pagination()
+    keyset_pagination_class = KeysetPagination(ordering=["-created_at", "-id"])
     
     def get(self, request):
-        winner_list = Winner.objects.filter(jackpot__is_active=False, participant_address__isnull=True).order_by(
-        "-created_at"
+        winner_list = Winner.objects.filter(jackpot__is_active=False, participant_address__isnull=True).select_related("jackpot").order_by(
+        "-created_at", "-id"
     )
+        if self.keyset_pagination_class.is_requested(request):
+            page = self.keyset_pagination_class.paginate(winner_list, request)
+            serializer = WinnerSerializer(page.rows, many=True)
+            return Response({"results": serializer.data, **page.data})
+
         paginator = Paginator(
             winner_list, self.pagination_class.get_page_size(request)
         )  # Use DRF to handle page size
@@ -1,2 +1,6 @@
 source .venv/bin/activate;
-celery -A config worker -l info
\ No newline at end of file
+# The worker processes write their task metrics here for the web tier's
+# /metrics to serve (METRICS_DIRS in start_asgi.sh); it must start empty.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/latam-nodes-metrics/celery}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+celery -A config worker -l info
@@ -57,7 +57,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'latam_nodes.base.middleware.WhiteNoiseMiddleware',
+    'latam_nodes.base.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -180,5 +181,42 @@ print("BASE_DIR:", BASE_DIR)
 print("MEDIA_ROOT:", MEDIA_ROOT)
 
 
+# Chain endpoints in failover order, comma separated.
+CELESTIA_LCD_URLS = os.getenv(
+    "CELESTIA_LCD_URLS", "https://api-celestia.mzonder.com"
+).split(",")
+CELESTIA_RPC_URLS = os.getenv(
+    "CELESTIA_RPC_URLS",
+    "https://rpc-celestia.mzonder.com,https://rpc-celestia-1.latamnodes.org",
+).split(",")
+CHAIN_CONNECT_TIMEOUT = float(os.getenv("CHAIN_CONNECT_TIMEOUT", "3.05"))
+CHAIN_READ_TIMEOUT = float(os.getenv("CHAIN_READ_TIMEOUT", "10"))
+CHAIN_MAX_RETRIES = int(os.getenv("CHAIN_MAX_RETRIES", "2"))
+CHAIN_RETRY_BACKOFF = float(os.getenv("CHAIN_RETRY_BACKOFF", "0.3"))
+CHAIN_POOL_SIZE = int(os.getenv("CHAIN_POOL_SIZE", "20"))
+# Upstream connections one ASGI worker may hold open at once.
+CHAIN_ASYNC_POOL_SIZE = int(os.getenv("CHAIN_ASYNC_POOL_SIZE", "100"))
+VALIDATOR_ADDRESS = os.getenv(
+    "VALIDATOR_ADDRESS", "celestiavaloper14v4ush42xewyeuuldf6jtdz0a7pxg5fwrlumwf"
+)
+# Default number of hex digits in a ticket hash for new jackpots
+# (Jackpot.ticket_hash_width); the ticket space is 16 ** width.
+TICKET_HASH_WIDTH = int(os.getenv("TICKET_HASH_WIDTH", "4"))
+DELEGATIONS_PAGE_SIZE = int(os.getenv("DELEGATIONS_PAGE_SIZE", "500"))
+DELEGATIONS_FETCH_WORKERS = int(os.getenv("DELEGATIONS_FETCH_WORKERS", "4"))
+
+UPSTREAM_CACHE_TTL = int(os.getenv("UPSTREAM_CACHE_TTL", "30"))
+UPSTREAM_NEGATIVE_CACHE_TTL = int(os.getenv("UPSTREAM_NEGATIVE_CACHE_TTL", "60"))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+ROUND_STATE_TTL = int(os.getenv("ROUND_STATE_TTL", "60"))
+
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+# Connects the task metrics signal handlers in every Celery process,
+# including beat, which stamps the publish time of the periodic tasks.
+CELERY_IMPORTS = ('latam_nodes.base.metrics',)
+
+# Multiprocess metric directories of other processes (the Celery workers')
+# that /metrics serves along with the web workers' PROMETHEUS_MULTIPROC_DIR.
+METRICS_DIRS = [path for path in os.getenv("METRICS_DIRS", "").split(",") if path]
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Run the block against a throwaway copy of the configured database.
+
+    Benchmarks truncate and refill tables, so they must never touch the real
+    data. The copy is created the same way the test runner does it, except
+    that on SQLite it is a file next to the database rather than in memory:
+    an in-memory copy would be invisible to server subprocesses.
+    """
+    old_name = connection.settings_dict["NAME"]
+    test_settings = connection.settings_dict["TEST"]
+    old_test_name = test_settings["NAME"]
+    if connection.vendor == "sqlite" and connection.creation.is_in_memory_db(
+        old_test_name or ":memory:"
+    ):
+        directory, filename = os.path.split(str(old_name))
+        test_settings["NAME"] = os.path.join(directory, f"test_{filename}")
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        test_settings["NAME"] = old_test_name
+
+
+@contextmanager
+def measure():
+    """Collect wall time (ms) and query count of the block into a dict."""
+    result = {"queries": 0}
+
+    # Counted in a wrapper rather than with CaptureQueriesContext, which
+    # stops at 9000 queries and adds its own logging overhead.
+    def count_query(execute, sql, params, many, context):
+        result["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        started = time.perf_counter()
+        yield result
+        result["ms"] = (time.perf_counter() - started) * 1000
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95)],
+        "p99": samples[int(len(samples) * 0.99)],
+        "max": samples[-1],
+    }
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """wsgiref server with a fixed pool of request threads, like gunicorn --threads."""
+
+    request_queue_size = 1024
+
+    def __init__(self, address, threads):
+        super().__init__(address, QuietHandler)
+        self.executor = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+def serve_wsgi(port, threads):
+    """Serve the project on `port` until killed; the target of `--serve-wsgi`."""
+    server = PooledWSGIServer(("127.0.0.1", port), threads)
+    server.set_app(get_wsgi_application())
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def server_process(command, port, env):
+    """Run a server in its own process so it does not share the load generator's GIL."""
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise CommandError(f"Server did not start: {' '.join(command)}")
+                time.sleep(0.1)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def http_request(port, method, target, body=b"", content_type=None):
+    """
+    Send one HTTP/1.1 request to 127.0.0.1:`port` and return (status, body).
+
+    A bare client: httpx's pool costs more CPU than the servers under test
+    at load-test concurrency and would become the bottleneck.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    headers = f"{method} {target} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+    if body:
+        headers += f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+    writer.write(headers.encode() + b"\r\n" + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    response = await reader.read()
+    writer.close()
+    return int(status_line.split()[1]), response.partition(b"\r\n\r\n")[2]
+
+
+def compare_to_baseline(baseline, results, threshold, min_ms=5.0):
+    """
+    Compare benchmark `results` with a `baseline` of the same shape,
+    {case: {"ms": ..., "queries": ..., "peak_mib": ...}}.
+
+    Yields (case, metric, old, new, regressed). A metric regresses when it
+    grew by more than `threshold` (0.2 = 20%); wall times also need to grow
+    by at least `min_ms` so timer noise on fast cases is not flagged. Query
+    counts are deterministic, so any increase counts.
+    """
+    for case, new in results.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        for metric in ("ms", "queries", "peak_mib"):
+            if metric not in old or metric not in new:
+                continue
+            before, after = old[metric], new[metric]
+            if metric == "queries":
+                regressed = after > before
+            else:
+                regressed = after > before * (1 + threshold)
+                if metric == "ms":
+                    regressed = regressed and after - before >= min_ms
+            yield case, metric, before, after, regressed
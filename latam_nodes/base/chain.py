@@ -0,0 +1,322 @@
+"""
+Process-wide client for the Celestia LCD and RPC endpoints.
+
+Every chain call goes through one pooled keep-alive session with timeouts,
+retries with backoff, and failover across the endpoints listed in
+`CELESTIA_LCD_URLS` / `CELESTIA_RPC_URLS`.
+
+LCD lookups made while serving requests also go through an in-process TTL
+cache keyed by endpoint and address. Error answers from the LCD (e.g. an
+invalid address) are cached for `UPSTREAM_NEGATIVE_CACHE_TTL`, and
+concurrent misses for the same key are coalesced into a single upstream call.
+The async views share that cache through an httpx-based client.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import observe_upstream
+
+
+class BaseChainClient:
+    def __init__(self, urls_setting, name):
+        self.urls_setting = urls_setting
+        # Label of the client's metrics.
+        self.name = name
+        self.preferred_url = None
+
+    @property
+    def base_urls(self):
+        urls = getattr(settings, self.urls_setting)
+        if self.preferred_url in urls:
+            return [self.preferred_url] + [url for url in urls if url != self.preferred_url]
+        return urls
+
+
+class ChainClient(BaseChainClient):
+    """
+    GET JSON from a list of equivalent endpoints.
+
+    The endpoint that answered last is tried first; when it fails (connection
+    error, timeout or 5xx after retries) the next one is used.
+    """
+
+    def __init__(self, urls_setting, name):
+        super().__init__(urls_setting, name)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=settings.CHAIN_POOL_SIZE,
+            max_retries=Retry(
+                total=settings.CHAIN_MAX_RETRIES,
+                backoff_factor=settings.CHAIN_RETRY_BACKOFF,
+                status_forcelist=(429, 502, 503, 504),
+                allowed_methods=("GET",),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path, params=None):
+        """Return the first non-5xx response; raise the last error if all fail."""
+        with observe_upstream(self.name):
+            return self._get(path, params)
+
+    def _get(self, path, params):
+        error = None
+        for base_url in self.base_urls:
+            try:
+                response = self.session.get(
+                    f"{base_url}{path}",
+                    params=params,
+                    timeout=(settings.CHAIN_CONNECT_TIMEOUT, settings.CHAIN_READ_TIMEOUT),
+                )
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            except requests.RequestException as e:
+                error = e
+                continue
+            self.preferred_url = base_url
+            return response
+        raise error
+
+    def get_json(self, path, params=None):
+        response = self.get(path, params)
+        response.raise_for_status()
+        return response.json()
+
+
+class AsyncChainClient(BaseChainClient):
+    """
+    ChainClient for coroutines, with the same failover order.
+
+    httpx clients are bound to the event loop that created them, so one is
+    kept per loop. Only connection failures are retried by the transport.
+    """
+
+    def __init__(self, urls_setting, name):
+        super().__init__(urls_setting, name)
+        self._client = None
+        self._loop = None
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    settings.CHAIN_READ_TIMEOUT, connect=settings.CHAIN_CONNECT_TIMEOUT
+                ),
+                transport=httpx.AsyncHTTPTransport(
+                    retries=settings.CHAIN_MAX_RETRIES,
+                    limits=httpx.Limits(
+                        max_connections=settings.CHAIN_ASYNC_POOL_SIZE,
+                        max_keepalive_connections=settings.CHAIN_POOL_SIZE,
+                    ),
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def get(self, path, params=None):
+        with observe_upstream(self.name):
+            return await self._get(path, params)
+
+    async def _get(self, path, params):
+        error = None
+        for base_url in self.base_urls:
+            try:
+                response = await self.client.get(f"{base_url}{path}", params=params)
+                if response.status_code >= 500:
+                    response.raise_for_status()
+            except httpx.HTTPError as e:
+                error = e
+                continue
+            self.preferred_url = base_url
+            return response
+        raise error
+
+
+lcd = ChainClient("CELESTIA_LCD_URLS", "lcd")
+rpc = ChainClient("CELESTIA_RPC_URLS", "rpc")
+async_lcd = AsyncChainClient("CELESTIA_LCD_URLS", "lcd")
+
+
+class TTLCache:
+    def __init__(self, ttl, negative_ttl, max_entries=10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return the cached value for `key` or call `fetch()` once to produce it.
+
+        `fetch` returns (value, ok); values with ok=False are cached for the
+        negative TTL. Exceptions are not cached and reach every waiter.
+        """
+        value, future, leader = self.claim(key)
+        if future is None:
+            return value
+        if not leader:
+            return future.result()
+
+        try:
+            value, ok = fetch()
+        except Exception as e:
+            self.fail(key, future, e)
+            raise
+        self.settle(key, future, value, ok)
+        return value
+
+    async def aget_or_fetch(self, key, fetch):
+        """get_or_fetch() for a coroutine `fetch`; shares entries and waiters."""
+        value, future, leader = self.claim(key)
+        if future is None:
+            return value
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value, ok = await fetch()
+        except BaseException as e:
+            # Cancellation must also release the key for the next caller.
+            self.fail(key, future, e)
+            raise
+        self.settle(key, future, value, ok)
+        return value
+
+    def claim(self, key):
+        """
+        Return (value, None, False) on a hit, else (None, future, leader).
+
+        The leader is the single caller that must fetch and settle the key.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1], None, False
+            future = self.pending.get(key)
+            if future is None:
+                self.misses += 1
+                future = self.pending[key] = Future()
+                return None, future, True
+            self.coalesced += 1
+            return None, future, False
+
+    def settle(self, key, future, value, ok):
+        expires_at = time.monotonic() + (self.ttl if ok else self.negative_ttl)
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.evict()
+            self.entries[key] = (expires_at, value)
+            del self.pending[key]
+        future.set_result(value)
+
+    def fail(self, key, future, error):
+        with self.lock:
+            del self.pending[key]
+        future.set_exception(error)
+
+    def evict(self):
+        now = time.monotonic()
+        self.entries = {
+            key: entry for key, entry in self.entries.items() if entry[0] > now
+        }
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "size": len(self.entries),
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+lcd_cache = TTLCache(
+    ttl=settings.UPSTREAM_CACHE_TTL, negative_ttl=settings.UPSTREAM_NEGATIVE_CACHE_TTL
+)
+
+
+# The LCD rejecting the query itself: a malformed or unknown address.
+NEGATIVE_CACHE_STATUSES = (400, 404)
+
+
+def lcd_get(path):
+    """
+    GET an LCD path through the cache and return the decoded JSON body.
+
+    400 and 404 answers are the LCD rejecting the query (malformed or unknown
+    address) and are negatively cached. Any other error, e.g. a 429 that
+    outlived the retries, raises and is never cached.
+    """
+
+    def fetch():
+        response = lcd.get(path)
+        if not response.ok and response.status_code not in NEGATIVE_CACHE_STATUSES:
+            response.raise_for_status()
+        return response.json(), response.ok
+
+    return lcd_cache.get_or_fetch(path, fetch)
+
+
+async def alcd_get(path):
+    async def fetch():
+        response = await async_lcd.get(path)
+        if response.is_error and response.status_code not in NEGATIVE_CACHE_STATUSES:
+            response.raise_for_status()
+        return response.json(), not response.is_error
+
+    return await lcd_cache.aget_or_fetch(path, fetch)
+
+
+def get_account(address):
+    return lcd_get(f"/cosmos/auth/v1beta1/accounts/{address}")
+
+
+def get_delegations(address):
+    return lcd_get(f"/cosmos/staking/v1beta1/delegations/{address}")
+
+
+def get_validator_delegation(address):
+    return lcd_get(
+        f"/cosmos/staking/v1beta1/validators/{settings.VALIDATOR_ADDRESS}/delegations/{address}"
+    )
+
+
+async def aget_account(address):
+    return await alcd_get(f"/cosmos/auth/v1beta1/accounts/{address}")
+
+
+async def aget_validator_delegation(address):
+    return await alcd_get(
+        f"/cosmos/staking/v1beta1/validators/{settings.VALIDATOR_ADDRESS}/delegations/{address}"
+    )
+
+
+def get_validator_commission():
+    return lcd.get_json(
+        f"/cosmos/distribution/v1beta1/validators/{settings.VALIDATOR_ADDRESS}/commission"
+    )
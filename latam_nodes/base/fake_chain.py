@@ -0,0 +1,251 @@
+"""
+A small in-process stand-in for the Celestia LCD and RPC APIs.
+
+It serves the endpoints this project calls from canned data so fetches,
+benchmarks and load tests can run without touching the real chain.
+"""
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_delegations(count, validator_address="celestiavaloper1fake"):
+    return [
+        {
+            "delegation": {
+                "delegator_address": f"celestia1fake{i:010d}",
+                "validator_address": validator_address,
+                "shares": f"{(i % 997 + 1) * 1000000}.000000000000000000",
+            },
+            "balance": {"denom": "utia", "amount": str((i % 997 + 1) * 1000000)},
+        }
+        for i in range(count)
+    ]
+
+
+def make_blocks(count, end_time=None, block_time=6.0, jitter=1.0, seed=0):
+    """Build `count` consecutive blocks ending at `end_time` (default: now)."""
+    rng = random.Random(seed)
+    end_time = end_time or datetime.now(timezone.utc)
+    offsets = [0.0]
+    for _ in range(count - 1):
+        offsets.append(offsets[-1] + block_time + rng.uniform(-jitter, jitter))
+    start_time = end_time - timedelta(seconds=offsets[-1])
+    return [
+        {
+            "height": height,
+            "hash": hashlib.sha256(str(height).encode()).hexdigest().upper(),
+            "time": start_time + timedelta(seconds=offset),
+        }
+        for height, offset in enumerate(offsets, start=1)
+    ]
+
+
+class FakeChainHandler(BaseHTTPRequestHandler):
+    chain = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        if self.chain.latency:
+            time.sleep(self.chain.latency)
+        self.chain.request_count += 1
+
+        status, body = self.chain.route(parsed.path.rstrip("/"), params)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeChainServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once; the default backlog is 5.
+    request_queue_size = 1024
+
+
+class FakeChain:
+    """
+    Serve canned chain data on a local port.
+
+    Use it as a context manager; `url` is the base URL to point settings at.
+    """
+
+    def __init__(
+        self,
+        delegations=None,
+        blocks=None,
+        latency=0,
+        supports_count_total=True,
+        max_page_size=1000,
+        port=0,
+    ):
+        self.delegations = delegations or []
+        self.blocks = blocks or []
+        self.latency = latency
+        self.supports_count_total = supports_count_total
+        self.max_page_size = max_page_size
+        self.request_count = 0
+        handler = type("Handler", (FakeChainHandler,), {"chain": self})
+        self.server = FakeChainServer(("127.0.0.1", port), handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def route(self, path, params):
+        if path.startswith("/cosmos/staking/v1beta1/validators/") and path.endswith(
+            "/delegations"
+        ):
+            return 200, self.validator_delegations(params)
+        if path.startswith("/cosmos/staking/v1beta1/validators/"):
+            return self.validator_delegation(path.rsplit("/", 1)[-1])
+        if path.startswith("/cosmos/staking/v1beta1/delegations/"):
+            return self.delegator_delegations(path.rsplit("/", 1)[-1])
+        if path.startswith("/cosmos/auth/v1beta1/accounts/"):
+            return self.account(path.rsplit("/", 1)[-1])
+        if path == "/block":
+            return self.block(params)
+        if path == "/blockchain":
+            return self.blockchain(params)
+        return 501, {"code": 12, "message": "Not Implemented"}
+
+    def validator_delegations(self, params):
+        limit = min(int(params.get("pagination.limit", 100)), self.max_page_size)
+        if "pagination.key" in params:
+            offset = int(base64.b64decode(params["pagination.key"]))
+        else:
+            offset = int(params.get("pagination.offset", 0))
+
+        page = self.delegations[offset : offset + limit]
+        end = offset + len(page)
+        next_key = (
+            base64.b64encode(str(end).encode()).decode()
+            if end < len(self.delegations)
+            else None
+        )
+        count_total = params.get("pagination.count_total") == "true"
+        total = len(self.delegations) if count_total and self.supports_count_total else 0
+        return {
+            "delegation_responses": page,
+            "pagination": {"next_key": next_key, "total": str(total)},
+        }
+
+    def find_delegations(self, address):
+        return [
+            delegation
+            for delegation in self.delegations
+            if delegation["delegation"]["delegator_address"] == address
+        ]
+
+    def invalid_address(self, address):
+        if not address.startswith("celestia1"):
+            return 400, {"code": 2, "message": f"decoding bech32 failed: {address}"}
+        return None
+
+    def account(self, address):
+        error = self.invalid_address(address)
+        if error:
+            return error
+        if not self.find_delegations(address):
+            return 404, {"code": 5, "message": f"account {address} not found"}
+        return 200, {
+            "account": {
+                "@type": "/cosmos.auth.v1beta1.BaseAccount",
+                "address": address,
+                "pub_key": None,
+                "account_number": "0",
+                "sequence": "0",
+            }
+        }
+
+    def delegator_delegations(self, address):
+        error = self.invalid_address(address)
+        if error:
+            return error
+        delegations = self.find_delegations(address)
+        return 200, {
+            "delegation_responses": delegations,
+            "pagination": {"next_key": None, "total": str(len(delegations))},
+        }
+
+    def validator_delegation(self, address):
+        error = self.invalid_address(address)
+        if error:
+            return error
+        delegations = self.find_delegations(address)
+        if not delegations:
+            return 404, {"code": 5, "message": "delegation not found"}
+        return 200, {"delegation_response": delegations[0]}
+
+    def block_header(self, block):
+        return {
+            "height": str(block["height"]),
+            "time": block["time"].strftime("%Y-%m-%dT%H:%M:%S.%f000Z"),
+        }
+
+    def block(self, params):
+        if not self.blocks:
+            return 500, {"error": {"code": -32603, "data": "no blocks"}}
+        height = int(params.get("height") or self.blocks[-1]["height"])
+        first_height = self.blocks[0]["height"]
+        if not first_height <= height <= self.blocks[-1]["height"]:
+            return 500, {
+                "error": {
+                    "code": -32603,
+                    "data": f"height {height} is not available, lowest height is {first_height}",
+                }
+            }
+        block = self.blocks[height - first_height]
+        return 200, {
+            "result": {
+                "block_id": {"hash": block["hash"]},
+                "block": {"header": self.block_header(block)},
+            }
+        }
+
+    def blockchain(self, params):
+        first_height = self.blocks[0]["height"] if self.blocks else 1
+        last_height = self.blocks[-1]["height"] if self.blocks else 0
+        max_height = min(int(params.get("maxHeight") or last_height), last_height)
+        min_height = max(int(params.get("minHeight") or 1), first_height, max_height - 19)
+        block_metas = [
+            {
+                "block_id": {"hash": block["hash"]},
+                "header": self.block_header(block),
+            }
+            for block in reversed(
+                self.blocks[min_height - first_height : max_height - first_height + 1]
+            )
+        ]
+        return 200, {
+            "result": {"last_height": str(last_height), "block_metas": block_metas}
+        }
@@ -0,0 +1,281 @@
+"""
+Prometheus metrics for the API views, the Celery tasks and the chain calls
+they make.
+
+MetricsMiddleware wraps every request in `observe_request`, which records its
+latency, status, database queries and time spent waiting on the chain,
+labelled by URL name. Queries are counted by an execute wrapper installed on
+each new database connection and chain calls by `observe_upstream`; both
+report into the current request through a context variable, so they also
+work for async views whose ORM calls run in sync_to_async threads.
+
+Celery task runs are recorded the same way from the task_prerun/postrun
+signals, labelled by task name, together with the rows they wrote and their
+queue lag: the time from publishing the message (the beat tick, for periodic
+tasks) to the start of the run, read from a header stamped at publish time.
+
+With several worker processes, point PROMETHEUS_MULTIPROC_DIR at an empty
+directory before they start; each process then writes its samples there and
+/metrics aggregates all of them, plus those of the directories listed in
+METRICS_DIRS (the Celery workers').
+"""
+import glob
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from celery.signals import before_task_publish, task_postrun, task_prerun, task_retry
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Time to serve a request, by URL name.",
+    ["view", "method"],
+)
+REQUESTS = Counter(
+    "api_requests_total",
+    "Requests served, by URL name and status code.",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "api_request_db_queries",
+    "Database queries run while serving a request.",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+REQUEST_DB_TIME = Histogram(
+    "api_request_db_duration_seconds",
+    "Time spent in database queries while serving a request.",
+    ["view"],
+)
+REQUEST_UPSTREAM_TIME = Histogram(
+    "api_request_upstream_duration_seconds",
+    "Time spent waiting on chain endpoints while serving a request.",
+    ["view"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "chain_request_duration_seconds",
+    "Calls to the chain endpoints, including retries and failover.",
+    ["client", "outcome"],
+)
+
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)
+TASK_LATENCY = Histogram(
+    "celery_task_duration_seconds",
+    "Run time of a Celery task, by outcome.",
+    ["task", "outcome"],
+    buckets=TASK_BUCKETS,
+)
+TASK_QUEUE_LAG = Histogram(
+    "celery_task_queue_lag_seconds",
+    "Time from publishing a task, or its ETA, to the start of its run.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+TASK_RETRIES = Counter("celery_task_retries", "Task runs that asked to be retried.", ["task"])
+TASK_QUERIES = Histogram(
+    "celery_task_db_queries",
+    "Database queries run by a task run.",
+    ["task"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+TASK_DB_TIME = Histogram(
+    "celery_task_db_duration_seconds",
+    "Time a task run spent in database queries.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+TASK_ROWS = Histogram(
+    "celery_task_db_rows_written",
+    "Rows inserted, updated or deleted by a task run.",
+    ["task"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000, 1000000, 10000000),
+)
+TASK_UPSTREAM_CALLS = Histogram(
+    "celery_task_upstream_requests",
+    "Calls to the chain endpoints made by a task run.",
+    ["task"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+)
+TASK_UPSTREAM_TIME = Histogram(
+    "celery_task_upstream_duration_seconds",
+    "Time a task run spent waiting on chain endpoints.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+DRAW_LATENESS = Gauge(
+    "jackpot_draw_lateness_seconds",
+    "How long the active jackpot's draw has been due, 0 when it is not; its "
+    "last value before dropping to 0 is how late the draw ran.",
+    multiprocess_mode="mostrecent",
+)
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+_current_stats = ContextVar("current_stats", default=None)
+
+
+class UsageStats:
+    """What the request or task run being observed has used so far."""
+
+    def __init__(self):
+        self.status = 500
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows_written = 0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+    # rowcount is the number of rows returned for a SELECT on PostgreSQL and
+    # -1 for statements such as SAVEPOINT.
+    if sql.lstrip()[:6].upper() != "SELECT":
+        stats.rows_written += max(context["cursor"].rowcount, 0)
+    return result
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextmanager
+def observe_upstream(client):
+    """Time a chain call for `client` ("lcd", "rpc") and the current request."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.labels(client, outcome).observe(elapsed)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.upstream_calls += 1
+            stats.upstream_seconds += elapsed
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "unmatched"
+
+
+@contextmanager
+def observe_request(request):
+    """Record the metrics of the request served in the block; set `.status`."""
+    stats = UsageStats()
+    token = _current_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        elapsed = time.perf_counter() - started
+        # resolver_match is only set once the URL has been resolved.
+        view = view_label(request)
+        method = request.method if request.method in METHODS else "other"
+        REQUEST_LATENCY.labels(view, method).observe(elapsed)
+        REQUESTS.labels(view, method, str(stats.status)).inc()
+        REQUEST_QUERIES.labels(view).observe(stats.queries)
+        REQUEST_DB_TIME.labels(view).observe(stats.db_seconds)
+        REQUEST_UPSTREAM_TIME.labels(view).observe(stats.upstream_seconds)
+
+
+# Task runs in progress in this process, by task id.
+_task_runs = {}
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    # Assigned rather than defaulted: a retry republishes the old headers.
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def start_task_run(task_id=None, task=None, **kwargs):
+    published_at = task.request.get("published_at")
+    if published_at:
+        ready_at = published_at
+        if task.request.eta:
+            ready_at = max(ready_at, datetime.fromisoformat(task.request.eta).timestamp())
+        TASK_QUEUE_LAG.labels(task.name).observe(max(time.time() - ready_at, 0))
+
+    stats = UsageStats()
+    token = _current_stats.set(stats)
+    _task_runs[task_id] = (stats, token, time.perf_counter())
+
+
+@task_postrun.connect
+def finish_task_run(task_id=None, task=None, state=None, **kwargs):
+    run = _task_runs.pop(task_id, None)
+    if run is None:
+        return
+    stats, token, started = run
+    _current_stats.reset(token)
+    outcome = state.lower() if state else "unknown"
+    TASK_LATENCY.labels(task.name, outcome).observe(time.perf_counter() - started)
+    TASK_QUERIES.labels(task.name).observe(stats.queries)
+    TASK_DB_TIME.labels(task.name).observe(stats.db_seconds)
+    TASK_ROWS.labels(task.name).observe(stats.rows_written)
+    TASK_UPSTREAM_CALLS.labels(task.name).observe(stats.upstream_calls)
+    TASK_UPSTREAM_TIME.labels(task.name).observe(stats.upstream_seconds)
+
+
+@task_retry.connect
+def count_task_retry(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+class DirectoriesCollector:
+    """Aggregate the multiprocess samples written to several directories."""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def collect(self):
+        files = [
+            file for path in self.paths for file in glob.glob(os.path.join(path, "*.db"))
+        ]
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def metrics_view(request):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        registry.register(
+            DirectoriesCollector(
+                [os.environ["PROMETHEUS_MULTIPROC_DIR"], *settings.METRICS_DIRS]
+            )
+        )
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,65 @@
+import asyncio
+
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from .metrics import observe_request
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run in async mode.
+
+    Under ASGI a sync-only middleware makes Django run the rest of the chain,
+    including async views, through its single thread-sensitive executor, so
+    requests would be served one at a time. Static file lookups are in-memory,
+    so they are done inline here and everything else is awaited.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if asyncio.iscoroutinefunction(get_response):
+            # Same marker Django's MiddlewareMixin sets for async mode.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Record per-view latency, status, query and upstream metrics (see metrics.py)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with observe_request(request) as stats:
+            response = self.get_response(request)
+            stats.status = response.status_code
+        return response
+
+    async def __acall__(self, request):
+        with observe_request(request) as stats:
+            response = await self.get_response(request)
+            stats.status = response.status_code
+        return response
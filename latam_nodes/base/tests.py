@@ -0,0 +1,33 @@
+import requests
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from .chain import get_account, lcd_cache
+from .fake_chain import FakeChain, make_delegations
+
+
+class RateLimitedChain(FakeChain):
+    def account(self, address):
+        return 429, {"code": 8, "message": "rate limited"}
+
+
+class LcdCacheTests(SimpleTestCase):
+    def setUp(self):
+        lcd_cache.clear()
+        self.addCleanup(lcd_cache.clear)
+
+    def test_rejected_address_is_cached(self):
+        with FakeChain() as chain, override_settings(CELESTIA_LCD_URLS=[chain.url]):
+            self.assertEqual(get_account("celestia1nobody")["code"], 5)
+            self.assertEqual(get_account("celestia1nobody")["code"], 5)
+        self.assertEqual(chain.request_count, 1)
+
+    def test_rate_limit_is_not_cached(self):
+        address = make_delegations(1)[0]["delegation"]["delegator_address"]
+        with RateLimitedChain() as chain, override_settings(CELESTIA_LCD_URLS=[chain.url]):
+            with self.assertRaises(requests.HTTPError):
+                get_account(address)
+            requests_made = chain.request_count
+            with self.assertRaises(requests.HTTPError):
+                get_account(address)
+        self.assertEqual(chain.request_count, 2 * requests_made)
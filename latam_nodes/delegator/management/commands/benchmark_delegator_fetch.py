@@ -0,0 +1,77 @@
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from latam_nodes.base.benchmark import benchmark_database, measure
+from latam_nodes.base.chain import lcd
+from latam_nodes.base.fake_chain import FakeChain, make_delegations
+from latam_nodes.delegator.models import Delegator
+from latam_nodes.delegator.tasks import (
+    iter_delegator_pages,
+    parse_delegations_page,
+    sync_delegators,
+)
+
+
+def sync_from_list():
+    """The previous behaviour: follow next_key serially, then save everything."""
+    path = f"/cosmos/staking/v1beta1/validators/{settings.VALIDATOR_ADDRESS}/delegations"
+    delegators_data = []
+    params = {}
+    while True:
+        data = lcd.get_json(path, params)
+        delegators_data.extend(parse_delegations_page(data))
+        next_key = data.get("pagination", {}).get("next_key")
+        if not next_key:
+            break
+        params = {"pagination.key": next_key}
+    # One page holding the whole list.
+    return sync_delegators([delegators_data])
+
+
+def sync_streaming():
+    return sync_delegators(iter_delegator_pages())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare wall time and peak memory of the list-based and streaming "
+        "delegator sync against a local fake LCD."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delegators", type=int, default=50000)
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument(
+            "--latency", type=float, default=0.02, help="Seconds per fake LCD response."
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        delegations = make_delegations(options["delegators"])
+
+        with benchmark_database(keepdb=options["keepdb"]):
+            for supports_count_total in (False, True):
+                chain = FakeChain(
+                    delegations=delegations,
+                    latency=options["latency"],
+                    supports_count_total=supports_count_total,
+                )
+                with chain, override_settings(
+                    CELESTIA_LCD_URLS=[chain.url],
+                    DELEGATIONS_PAGE_SIZE=options["page_size"],
+                ):
+                    for name, sync in (("list", sync_from_list), ("stream", sync_streaming)):
+                        Delegator.objects.all().delete()
+                        tracemalloc.start()
+                        with measure() as result:
+                            counts = sync()
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+                        self.stdout.write(
+                            f"count_total={str(supports_count_total):<5} mode={name:<6} "
+                            f"wall={result['ms']:.0f}ms peak={peak / 2 ** 20:.1f}MiB "
+                            f"inserted={counts['inserted']}"
+                        )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from latam_nodes.base.fake_chain import FakeChain, make_delegations
+
+
+class Command(BaseCommand):
+    help = "Serve a local fake Celestia LCD with synthetic delegations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=1317)
+        parser.add_argument("--delegators", type=int, default=1000)
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Seconds added to each response."
+        )
+        parser.add_argument("--no-count-total", action="store_true")
+
+    def handle(self, *args, **options):
+        chain = FakeChain(
+            delegations=make_delegations(options["delegators"]),
+            latency=options["latency"],
+            supports_count_total=not options["no_count_total"],
+            port=options["port"],
+        )
+        with chain:
+            self.stdout.write(f"Fake chain listening on {chain.url}")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
@@ -1,60 +1,185 @@
-import math
-import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from datetime import datetime, timedelta, timezone
-from urllib.parse import quote_plus
+from itertools import islice
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Sum
-from requests.sessions import Session
 
-from latam_nodes.delegator.utils import get_total_delegation_amount
+from latam_nodes.base.chain import lcd
+from latam_nodes.base.metrics import DRAW_LATENESS
+from latam_nodes.delegator.utils import (
+    delete_delegators,
+    get_total_delegation_amount,
+    upsert_delegators,
+)
 from latam_nodes.delegator.models import Delegator
+from latam_nodes.ticket.blocks import BlockTimeResolver
+from latam_nodes.ticket.distribution import distribute_free_tickets
 from latam_nodes.ticket.models import Jackpot, Participant, Ticket, Winner
-from latam_nodes.ticket.utils import generate_hex_hash
+from latam_nodes.ticket.utils import (
+    get_ticket_hash_width,
+    reset_round,
+    snapshot_round_allocations,
+    start_round,
+    ticket_hash_from_block_hash,
+)
 
+logger = logging.getLogger(__name__)
 
-def fetch_delegators_data(session):
-    url_base = "https://api-celestia.mzonder.com/cosmos/staking/v1beta1/validators/celestiavaloper14v4ush42xewyeuuldf6jtdz0a7pxg5fwrlumwf/delegations"
-    next_key = None
-    delegators_data = []
-    exclude_addresses = {
-        "celestia1eauf4n38gnandag9exlqrr6yy5y4852wdsfawx",
-        "celestia1ll34vjd8d7r0fef04yk6xs2y6gfn009dk34we7",
-    }
-
-    while True:
-        if next_key:
-            encoded_next_key = quote_plus(next_key)
-            url = f"{url_base}?pagination.key={encoded_next_key}"
-        else:
-            url = url_base
+EXCLUDED_DELEGATOR_ADDRESSES = {
+    "celestia1eauf4n38gnandag9exlqrr6yy5y4852wdsfawx",
+    "celestia1ll34vjd8d7r0fef04yk6xs2y6gfn009dk34we7",
+}
 
-        response = session.get(url)
-        data = response.json()
 
-        for delegation in data.get("delegation_responses", []):
-            address = delegation["delegation"]["delegator_address"]
-            if address not in exclude_addresses:
-                delegator_data = {
+def parse_delegations_page(data):
+    delegators_data = []
+    for delegation in data.get("delegation_responses", []):
+        address = delegation["delegation"]["delegator_address"]
+        if address not in EXCLUDED_DELEGATOR_ADDRESSES:
+            delegators_data.append(
+                {
                     "address": address,
                     "balance": float(delegation["delegation"]["shares"]) / 1e6,
                 }
-                delegators_data.append(delegator_data)
+            )
+    return delegators_data
 
-        next_key = data.get("pagination", {}).get("next_key")
-        if not next_key:
-            break
 
-    return delegators_data
+class DelegatorPages:
+    """
+    The validator's delegators, one parsed page at a time.
 
+    When the LCD reports `pagination.total`, the remaining pages are fetched
+    by offset with up to `workers` requests in flight. Otherwise the
+    `next_key` chain is followed and the next page is downloaded while the
+    caller processes the current one.
 
-def save_delegators(delegators_data):
-    delegators = [Delegator(**data) for data in delegators_data]
+    Offset pages are not a consistent snapshot: when delegations change
+    mid-fetch, rows shift between pages and a delegator can be skipped. Once
+    iterated, `complete` tells whether the distinct addresses served match
+    the reported total.
+    """
 
+    def __init__(self, page_size=None, workers=None):
+        self.path = (
+            f"/cosmos/staking/v1beta1/validators/{settings.VALIDATOR_ADDRESS}/delegations"
+        )
+        self.page_size = page_size or settings.DELEGATIONS_PAGE_SIZE
+        self.workers = workers or settings.DELEGATIONS_FETCH_WORKERS
+        self.total = 0
+        self.addresses = set()
+
+    @property
+    def complete(self):
+        # A next_key chain continues after the last key served, so nothing is
+        # skipped when the LCD reports no total.
+        return not self.total or len(self.addresses) == self.total
+
+    def fetch_page(self, **pagination):
+        params = {"pagination.limit": self.page_size}
+        params.update({f"pagination.{key}": value for key, value in pagination.items()})
+        return lcd.get_json(self.path, params)
+
+    def parse(self, data):
+        delegations = data.get("delegation_responses", [])
+        self.addresses.update(d["delegation"]["delegator_address"] for d in delegations)
+        return parse_delegations_page(data)
+
+    def __iter__(self):
+        data = self.fetch_page(count_total="true")
+        self.total = total = int(data.get("pagination", {}).get("total") or 0)
+        # Nodes may cap the page size below what we asked for.
+        served = len(data.get("delegation_responses", []))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def submit(**pagination):
+                # In a copy of the caller's context, so the fetch counts toward
+                # the metrics of the task run that iterates the pages.
+                return executor.submit(copy_context().run, self.fetch_page, **pagination)
+
+            if served and total > served:
+                offsets = iter(range(served, total, served))
+                in_flight = deque(
+                    submit(offset=offset) for offset in islice(offsets, self.workers)
+                )
+                yield self.parse(data)
+                while in_flight:
+                    data = in_flight.popleft().result()
+                    for offset in islice(offsets, 1):
+                        in_flight.append(submit(offset=offset))
+                    yield self.parse(data)
+                return
+
+            while True:
+                next_key = data.get("pagination", {}).get("next_key")
+                next_page = submit(key=next_key) if next_key else None
+                yield self.parse(data)
+                if next_page is None:
+                    break
+                data = next_page.result()
+
+
+def iter_delegator_pages(page_size=None, workers=None):
+    """The validator's delegators page by page; see DelegatorPages."""
+    return DelegatorPages(page_size, workers)
+
+
+def sync_delegators(pages):
+    """
+    Sync the Delegator table with a freshly fetched snapshot.
+
+    `pages` is an iterable of delegator lists; each page is written as soon
+    as it arrives. Only new or changed balances are upserted and departed
+    addresses are deleted once the whole snapshot has been seen, so readers
+    never see an empty table; when `pages` reports itself incomplete (see
+    DelegatorPages) nobody is deleted. Returns the row counts.
+    """
+    current_balances = dict(Delegator.objects.values_list("address", "balance"))
+    seen_addresses = set()
+    inserted_count = updated_count = 0
+
+    for page in pages:
+        changed_rows = []
+        for data in page:
+            address = data["address"]
+            if address in seen_addresses:
+                continue
+            seen_addresses.add(address)
+            if current_balances.get(address) != data["balance"]:
+                changed_rows.append((address, data["balance"]))
+                if address in current_balances:
+                    updated_count += 1
+                else:
+                    inserted_count += 1
+
+        with transaction.atomic():
+            upsert_delegators(changed_rows)
+
+    if getattr(pages, "complete", True):
+        departed_addresses = list(current_balances.keys() - seen_addresses)
+    else:
+        # A delegator missing from a shifted page is not departed.
+        logger.warning(
+            "Delegations changed while fetching (%s of %s served); "
+            "not deleting departed delegators",
+            len(pages.addresses),
+            pages.total,
+        )
+        departed_addresses = []
     with transaction.atomic():
-        Delegator.objects.all().delete()
-        Delegator.objects.bulk_create(delegators, ignore_conflicts=True)
+        delete_delegators(departed_addresses)
+
+    return {
+        "inserted": inserted_count,
+        "updated": updated_count,
+        "deleted": len(departed_addresses),
+    }
 
 
 def update_ticket_cost_for_latest_jackpot():
@@ -72,15 +197,14 @@ def update_ticket_cost_for_latest_jackpot():
     except Jackpot.DoesNotExist:
         return  # No active jackpot exists
 
+    # The percentage is a Decimal and the delegation total a float.
+    reward_share = float(latest_active_jackpot.reward_percentage) / 100
+
     # Calculate tickets to assign based on the winning percentage
-    tickets_to_assign = total_number_of_tickets * (
-        latest_active_jackpot.reward_percentage / 100
-    )
+    tickets_to_assign = total_number_of_tickets * reward_share
 
     # Calculate total money for tickets based on the winning percentage
-    total_money_for_tickets = total_amount_of_money * (
-        latest_active_jackpot.reward_percentage / 100
-    )
+    total_money_for_tickets = total_amount_of_money * reward_share
 
     # Calculate the cost per ticket
     if tickets_to_assign > 0:
@@ -90,59 +214,21 @@ def update_ticket_cost_for_latest_jackpot():
 
     # Update the latest active jackpot instance with the calculated ticket cost
     latest_active_jackpot.ticket_cost = ticket_cost
-    latest_active_jackpot.save()
+    latest_active_jackpot.save(update_fields=["ticket_cost", "updated_at"])
 
 
 def fetch_latest_block_data(latest_active_jackpot: Jackpot):
-    # url = "https://rpc-celestia-1.latamnodes.org/block"
-    basic_url = "https://rpc-celestia.mzonder.com/block"
-    closest_block_hash = None
-    closest_height = None
-    closest_block_date = None
-    current_time_diff = None
-
-    with Session() as session:
-        jackpot_endtime = latest_active_jackpot.draw_date
-        url = basic_url
-        while True:
-            try:
-                response = session.get(url)
-                data = response.json()
-                
-                block_id = data["result"]["block_id"]["hash"]
-                block_height = int(data["result"]["block"]["header"]["height"])
-                block_time_str = data["result"]["block"]["header"]["time"]
-                block_time = datetime.fromisoformat(block_time_str)
-
-                previous_block_height = block_height - 1
-                
-                previous_time_diff = abs((jackpot_endtime - block_time).total_seconds())
-                
-                if current_time_diff is None:
-                    url = f"{basic_url}?height={previous_block_height}"
-                    # print(url, data)
-                    current_time_diff = previous_time_diff
-                    continue
-                
-                if current_time_diff < previous_time_diff:
-                    closest_block_hash = block_id
-                    closest_height = block_height
-                    closest_block_date = block_time
-                    break
-                
-                current_time_diff = previous_time_diff
-                url = f"{basic_url}?height={previous_block_height}"
-            except Exception as e:
-                print(f"Error fetching block data: {e}")
-                time.sleep(1)
+    block = BlockTimeResolver().find_closest(latest_active_jackpot.draw_date)
 
-    return closest_block_hash, closest_height, closest_block_date
+    return block.hash, block.height, block.time
 
 
 def check_winner_and_update_winner_model(closest_block_hash, height, closest_block_date):
-    last_four_digits = closest_block_hash[-4:]
+    winning_hash = ticket_hash_from_block_hash(
+        closest_block_hash, get_ticket_hash_width()
+    )
     try:
-        winning_ticket = Ticket.objects.get(hash__endswith=last_four_digits)
+        winning_ticket = Ticket.objects.select_related("address").get(pk=winning_hash)
         participant_address = (
             winning_ticket.address.address if winning_ticket.address else None
         )
@@ -161,18 +247,19 @@ def check_winner_and_update_winner_model(closest_block_hash, height, closest_blo
             winner.participant_address = participant_address
 
         winner.save()
-    except Ticket.DoesNotExist or Jackpot.DoesNotExist or Exception as e:
+    except (Ticket.DoesNotExist, Jackpot.DoesNotExist) as e:
         # No winning ticket found
-        print(e)
+        logger.warning("No winner for block %s: %s", height, e)
 
 
+@transaction.atomic
 def clear_tickets_and_set_participants_inactive():
-    activated_tickets = Ticket.objects.filter(address__isnull=False)
-    activated_tickets.update(address=None)
-    Participant.objects.update(is_active=False)  # Set all participants as inactive
     latest_active_jackpot = Jackpot.objects.filter(is_active=True).latest("draw_date")
+    # Keep the round's ticket ownership before the reset clears it.
+    snapshot_round_allocations(latest_active_jackpot)
+    reset_round()
     latest_active_jackpot.is_active = False
-    latest_active_jackpot.save()
+    latest_active_jackpot.save(update_fields=["is_active", "updated_at"])
 
 
 def switch_jackpot_status():
@@ -185,19 +272,17 @@ def switch_jackpot_status():
         # Ensure the latest jackpot is different from the active one
         if latest_active_jackpot.draw_date != latest_jackpot.draw_date:
             latest_active_jackpot.is_active = False
-            latest_active_jackpot.save()
+            latest_active_jackpot.save(update_fields=["is_active", "updated_at"])
 
             latest_jackpot.is_active = True
-            latest_jackpot.save()
+            latest_jackpot.save(update_fields=["is_active", "updated_at"])
     except Jackpot.DoesNotExist:
         pass  # Handle the case where no jackpots are found
 
 
 @shared_task(name="save_delegators_task")
 def save_delegators_task():
-    with Session() as session:
-        delegators_data = fetch_delegators_data(session)
-    save_delegators(delegators_data)
+    return sync_delegators(iter_delegator_pages())
 
 
 @shared_task(name="check_and_save_winner_task")
@@ -212,53 +297,28 @@ def check_and_save_winner_task():
             current_time > latest_active_jackpot.draw_date
             and latest_active_jackpot.is_active
         ):
+            # Stays set, and grows on each run, until a draw succeeds.
+            lateness = (current_time - latest_active_jackpot.draw_date).total_seconds()
+            DRAW_LATENESS.set(lateness)
             closest_block_hash, height, closest_block_date = fetch_latest_block_data(latest_active_jackpot)
             check_winner_and_update_winner_model(closest_block_hash, height, closest_block_date)
             # save_delegators_task.delay()
             clear_tickets_and_set_participants_inactive()
+            logger.info(
+                "Drew jackpot %s at block %s, %.0fs after its draw date",
+                latest_active_jackpot.pk,
+                height,
+                lateness,
+            )
+        else:
+            DRAW_LATENESS.set(0)
     except Jackpot.DoesNotExist:
-        pass
+        DRAW_LATENESS.set(0)
 
 
 @shared_task(name="create_ticket")
 def create_ticket():
-    Ticket.objects.all().delete()
-    hash_list = generate_hex_hash()
-    batch_size = 1000
-    tickets = []
-
-    for hash in hash_list:
-        tickets.append(Ticket(hash=hash))
-        if len(tickets) == batch_size:
-            Ticket.objects.bulk_create(tickets)
-            tickets = []
-
-    # Save any remaining tickets
-    if tickets:
-        Ticket.objects.bulk_create(tickets)
-    try:
-        Participant.objects.update(is_active=False)
-    except Participant.DoesNotExist:
-        pass
-
-
-def update_ticket_for_distribute(ticket_count, tickets, participant):
-    tickets_to_update = []
-    batch_size = 1000
-
-    for i in range(min(ticket_count, len(tickets))):
-        tickets[i].address = participant
-        tickets_to_update.append(tickets[i])
-        if len(tickets_to_update) >= batch_size:
-            Ticket.objects.bulk_update(tickets_to_update, ["address"])
-            tickets_to_update.clear()
-
-    if tickets_to_update:
-        Ticket.objects.bulk_update(tickets_to_update, ["address"])
-
-    tickets = tickets[min(ticket_count, len(tickets)) :]
-
-    return tickets
+    start_round(get_ticket_hash_width())
 
 
 @shared_task(name="distribute_ticket_task")
@@ -277,42 +337,24 @@ def distribute_ticket():
             time_delta.total_seconds() / 60
             < latest_active_jackpot.start_distribute_time
             and not latest_active_jackpot.distributed_status
+            # Wait until setup_jackpot_round has dealt the round's tickets.
+            and latest_active_jackpot.setup_status == Jackpot.SetupStatus.DONE
         ):
-            rest_tickets = Ticket.objects.filter(address__isnull=True).order_by("?")
             distributed_tickets_count = Ticket.objects.exclude(address__isnull=True).count()
             total_ticket_count = Ticket.objects.count() * float(latest_active_jackpot.winning_percentage) // 100
-            rest_tickets_count = total_ticket_count - distributed_tickets_count
+            rest_tickets_count = int(total_ticket_count - distributed_tickets_count)
 
-            rest_tickets = rest_tickets[:rest_tickets_count]
-            
             participant_list = Participant.objects.filter(is_active=True)
-            
-            total_amount_of_money = participant_list.aggregate(Sum("balance"))["balance__sum"]
-            
-            if total_amount_of_money is None:
-                total_amount_of_money = 0  # Handle cases where no balance is available
-            
-            while len(rest_tickets) > 0:
-                if(participant_list.count() < 1):
-                    break
-                
-                for participant in participant_list:
-                    ticket_count = math.ceil(
-                        rest_tickets_count
-                        * float(participant.balance)
-                        / float(total_amount_of_money)
-                    )
-
-                    rest_tickets = update_ticket_for_distribute(
-                        ticket_count=ticket_count,
-                        tickets=rest_tickets,
-                        participant=participant,
-                    )
-                    if len(rest_tickets) == 0:
-                        break
+            distribute_free_tickets(participant_list, rest_tickets_count)
             latest_active_jackpot.distributed_status = True
-            latest_active_jackpot.save()
+            latest_active_jackpot.save(update_fields=["distributed_status", "updated_at"])
+            logger.info(
+                "Distributed up to %s free tickets for jackpot %s",
+                rest_tickets_count,
+                latest_active_jackpot.pk,
+            )
 
-    except Exception as e:
-        print(e)
+    except Jackpot.DoesNotExist:
+        # No active jackpot. Any other error fails the task, so it is logged
+        # with its traceback and counted in the task metrics.
         pass
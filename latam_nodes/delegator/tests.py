@@ -0,0 +1,75 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from latam_nodes.base.fake_chain import FakeChain, make_delegations
+
+from .models import Delegator
+from .tasks import iter_delegator_pages, sync_delegators
+
+
+def address(delegation):
+    return delegation["delegation"]["delegator_address"]
+
+
+class ShiftingChain(FakeChain):
+    """Drops a delegation from the first page once the second one is requested."""
+
+    def validator_delegations(self, params):
+        if params.get("pagination.offset") and not getattr(self, "shifted", False):
+            self.shifted = True
+            del self.delegations[2]
+        return super().validator_delegations(params)
+
+
+class SyncDelegatorsTests(TestCase):
+    def setUp(self):
+        self.delegations = make_delegations(250)
+        # One unchanged, one with a stale balance and one who left.
+        Delegator.objects.bulk_create(
+            [
+                Delegator(address=address(self.delegations[0]), balance=1),
+                Delegator(address=address(self.delegations[1]), balance=999),
+                Delegator(address="celestia1departed", balance=5),
+            ]
+        )
+
+    def sync(self, chain, **options):
+        with chain, override_settings(CELESTIA_LCD_URLS=[chain.url]):
+            pages = iter_delegator_pages(**options)
+            return sync_delegators(pages), pages
+
+    def assertSynced(self, counts):
+        self.assertEqual(counts, {"inserted": 248, "updated": 1, "deleted": 1})
+        self.assertEqual(
+            dict(Delegator.objects.values_list("address", "balance")),
+            {address(d): float(d["delegation"]["shares"]) / 1e6 for d in self.delegations},
+        )
+
+    def test_offset_pages(self):
+        chain = FakeChain(delegations=self.delegations, max_page_size=100)
+        counts, pages = self.sync(chain, page_size=100, workers=2)
+        self.assertTrue(pages.complete)
+        self.assertEqual(chain.request_count, 3)
+        self.assertSynced(counts)
+
+    def test_next_key_pages(self):
+        chain = FakeChain(
+            delegations=self.delegations, max_page_size=100, supports_count_total=False
+        )
+        counts, pages = self.sync(chain, page_size=100)
+        self.assertTrue(pages.complete)
+        self.assertEqual(chain.request_count, 3)
+        self.assertSynced(counts)
+
+    def test_shifted_pages_delete_nobody(self):
+        # The first delegator of the second page moves onto the first one,
+        # which was already served, so it is never seen.
+        skipped = address(self.delegations[100])
+        Delegator.objects.create(address=skipped, balance=1)
+        chain = ShiftingChain(delegations=self.delegations[:], max_page_size=100)
+        counts, pages = self.sync(chain, page_size=100, workers=1)
+        self.assertFalse(pages.complete)
+        self.assertNotIn(skipped, pages.addresses)
+        self.assertEqual(counts["deleted"], 0)
+        self.assertTrue(Delegator.objects.filter(address=skipped).exists())
+        self.assertTrue(Delegator.objects.filter(address="celestia1departed").exists())
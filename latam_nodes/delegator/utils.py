@@ -1,3 +1,4 @@
+from django.db import connection
 from django.db.models import Sum
 from .models import Delegator
 
@@ -8,4 +9,25 @@ def get_total_delegation_amount():
     if total_amount_of_delegation is None:
         total_amount_of_delegation = 0  # Handle cases where no balance is available
         
-    return total_amount_of_delegation
\ No newline at end of file
+    return total_amount_of_delegation
+
+
+def upsert_delegators(rows, batch_size=1000):
+    """Insert or update (address, balance) rows with ON CONFLICT DO UPDATE."""
+    table = Delegator._meta.db_table
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            placeholders = ", ".join(["(%s, %s)"] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} (address, balance) VALUES {placeholders} "
+                "ON CONFLICT (address) DO UPDATE SET balance = EXCLUDED.balance",
+                [value for row in batch for value in row],
+            )
+
+
+def delete_delegators(addresses, batch_size=1000):
+    for start in range(0, len(addresses), batch_size):
+        Delegator.objects.filter(
+            address__in=addresses[start : start + batch_size]
+        ).delete()
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .forms import JackpotForm
 
-from .models import Participant, Ticket, Jackpot, Winner
+from .models import Participant, RoundAllocation, Ticket, Jackpot, Winner
 
 admin.site.register(Participant, )
 admin.site.register(Ticket, )
@@ -10,5 +10,13 @@ admin.site.register(Ticket, )
 class JackpotAdmin(admin.ModelAdmin):
     form = JackpotForm
     exclude = ["reward",]
+    readonly_fields = ["setup_status", "setup_progress", "setup_error"]
+
+    def get_readonly_fields(self, request, obj=None):
+        # The ticket table is built for the width when the jackpot is created.
+        if obj:
+            return ["ticket_hash_width", *self.readonly_fields]
+        return self.readonly_fields
 
 admin.site.register(Winner, )
+admin.site.register(RoundAllocation, )
@@ -0,0 +1,172 @@
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from latam_nodes.base.chain import rpc
+
+from .models import BlockHeader
+
+Block = namedtuple("Block", ["height", "hash", "time"])
+
+
+class BlockLookupError(Exception):
+    pass
+
+
+def parse_block_time(value):
+    # Tendermint returns RFC 3339 with nanoseconds and a trailing "Z".
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    return datetime.fromisoformat(value)
+
+
+class BlockTimeResolver:
+    """
+    Find the block whose time is closest to a target time.
+
+    The height is first estimated from the average block time near the tip,
+    then narrowed with interpolation steps interleaved with plain bisection,
+    so a lookup costs O(log n) requests however late the draw runs.
+
+    Fetched headers are kept in the BlockHeader table and read from there
+    first, so retrying or re-auditing a draw needs few or no RPC calls.
+    """
+
+    sample_distance = 1000
+    # Tendermint's /blockchain endpoint returns at most 20 headers per call.
+    batch_size = 20
+
+    def __init__(self, client=None, cache=True):
+        self.client = client or rpc
+        self.cache = cache
+
+    def request(self, path, params):
+        try:
+            return self.client.get_json(path, params)["result"]
+        except Exception as e:
+            raise BlockLookupError(f"Could not fetch {path} {params}: {e}") from e
+
+    def get_block(self, height=None):
+        if height is not None and self.cache:
+            header = BlockHeader.objects.filter(height=height).first()
+            if header:
+                return Block(header.height, header.hash, header.time)
+
+        params = {"height": height} if height is not None else {}
+        result = self.request("/block", params)
+        header = result["block"]["header"]
+        block = Block(
+            int(header["height"]),
+            result["block_id"]["hash"],
+            parse_block_time(header["time"]),
+        )
+        self.store([block])
+        return block
+
+    def prefetch(self, min_height, max_height):
+        """Cache headers in [min_height, max_height] via the batch endpoint."""
+        if not self.cache or min_height > max_height:
+            return
+        cached = BlockHeader.objects.filter(
+            height__gte=min_height, height__lte=max_height
+        ).count()
+        if cached == max_height - min_height + 1:
+            return
+
+        for start in range(min_height, max_height + 1, self.batch_size):
+            end = min(start + self.batch_size - 1, max_height)
+            result = self.request("/blockchain", {"minHeight": start, "maxHeight": end})
+            self.store(
+                Block(
+                    int(meta["header"]["height"]),
+                    meta["block_id"]["hash"],
+                    parse_block_time(meta["header"]["time"]),
+                )
+                for meta in result["block_metas"]
+            )
+
+    def store(self, blocks):
+        if self.cache:
+            BlockHeader.objects.bulk_create(
+                [BlockHeader(height=b.height, hash=b.hash, time=b.time) for b in blocks],
+                ignore_conflicts=True,
+            )
+
+    def closest_cached(self, target_time):
+        """Answer from the cache alone when it holds both neighbours of the target."""
+        if not self.cache:
+            return None
+        low = BlockHeader.objects.filter(time__lte=target_time).order_by("-time").first()
+        high = BlockHeader.objects.filter(time__gt=target_time).order_by("time").first()
+        if not low or not high or high.height != low.height + 1:
+            return None
+        return self.closer(
+            Block(low.height, low.hash, low.time),
+            Block(high.height, high.hash, high.time),
+            target_time,
+        )
+
+    @staticmethod
+    def closer(low, high, target_time):
+        if abs((high.time - target_time).total_seconds()) < abs(
+            (target_time - low.time).total_seconds()
+        ):
+            return high
+        return low
+
+    def find_closest(self, target_time):
+        cached = self.closest_cached(target_time)
+        if cached:
+            return cached
+
+        tip = self.get_block()
+        if target_time >= tip.time:
+            return tip
+
+        low, high = self.find_bracket(tip, target_time)
+        if low.time >= target_time:
+            return low
+
+        bisect = False
+        while high.height - low.height > 1:
+            if high.height - low.height <= self.batch_size:
+                self.prefetch(low.height + 1, high.height - 1)
+
+            if bisect:
+                height = (low.height + high.height) // 2
+            else:
+                span = (high.time - low.time).total_seconds() or 1
+                fraction = (target_time - low.time).total_seconds() / span
+                height = low.height + round(fraction * (high.height - low.height))
+            height = min(max(height, low.height + 1), high.height - 1)
+            bisect = not bisect
+
+            block = self.get_block(height)
+            if block.time <= target_time:
+                low = block
+            else:
+                high = block
+
+        return self.closer(low, high, target_time)
+
+    def find_bracket(self, tip, target_time):
+        """
+        Return blocks (low, high) with low.time <= target_time < high.time.
+
+        Jumps back by the distance estimated from the average block time near
+        the tip and doubles the jump until it lands at or before the target.
+        """
+        high = tip
+        block = self.get_block(max(tip.height - self.sample_distance, 1))
+        seconds_per_block = (tip.time - block.time).total_seconds() / max(
+            tip.height - block.height, 1
+        )
+        step = None
+        while block.time > target_time and block.height > 1:
+            high = block
+            if step is None:
+                lag = (block.time - target_time).total_seconds()
+                step = max(int(lag * 1.1 / (seconds_per_block or 1)), 1)
+            else:
+                step *= 2
+            block = self.get_block(max(block.height - step, 1))
+        return block, high
@@ -0,0 +1,111 @@
+from collections import Counter
+
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Ticket
+from .round_state import add_claimed_tickets
+from .utils import get_free_ticket_pool
+
+
+def apportion(balances, ticket_count):
+    """
+    Split `ticket_count` tickets proportionally to `balances`.
+
+    Uses largest-remainder apportionment: every participant gets the floor of
+    their exact quota and the leftover tickets go to the largest fractional
+    remainders (ties broken by input order). The result always sums to
+    `ticket_count` and does not depend on the order participants are visited.
+    """
+    balances = np.nan_to_num(np.asarray(balances, dtype=np.float64)).clip(min=0)
+    seats = np.zeros(len(balances), dtype=np.int64)
+    total_balance = balances.sum()
+    if ticket_count <= 0 or total_balance <= 0:
+        return seats
+
+    quotas = balances * (ticket_count / total_balance)
+    seats = np.floor(quotas).astype(np.int64)
+    leftover = ticket_count - int(seats.sum())
+    if leftover > 0:
+        order = np.argsort(seats - quotas, kind="stable")
+        seats[order[:leftover]] += 1
+    return seats
+
+
+def distribute_free_tickets(participants, ticket_count):
+    """
+    Hand out `ticket_count` free tickets across `participants` by balance.
+
+    Allocations are computed in one NumPy pass and written with a single
+    UPDATE. Returns the number of tickets assigned.
+    """
+    rows = list(participants.order_by("address").values_list("address", "balance"))
+    if not rows or ticket_count <= 0:
+        return 0
+
+    addresses = [address for address, _ in rows]
+    seats = apportion([balance or 0 for _, balance in rows], int(ticket_count))
+    if not seats.sum():
+        # Nobody has a positive balance to share the tickets by.
+        return 0
+    owners = seats > 0
+    addresses = [address for address, owner in zip(addresses, owners) if owner]
+    seats = seats[owners]
+    last_slots = np.cumsum(seats)
+    first_slots = last_slots - seats
+
+    if connection.vendor == "postgresql":
+        return _write_allocation_postgresql(
+            addresses, first_slots.tolist(), last_slots.tolist()
+        )
+    return _write_allocation(addresses, first_slots.tolist(), last_slots.tolist())
+
+
+def _write_allocation_postgresql(addresses, first_slots, last_slots):
+    table = Ticket._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH free AS (
+                SELECT hash, row_number() OVER (ORDER BY position) - 1 AS slot
+                FROM (
+                    SELECT hash, position FROM {table}
+                    WHERE address_id IS NULL
+                    ORDER BY position
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ) AS locked
+            ),
+            slots AS (
+                SELECT address_id, generate_series(first_slot, last_slot - 1) AS slot
+                FROM unnest(%s::varchar[], %s::bigint[], %s::bigint[])
+                    AS allocation(address_id, first_slot, last_slot)
+            )
+            UPDATE {table} AS t SET address_id = slots.address_id, updated_at = %s
+            FROM free JOIN slots ON slots.slot = free.slot
+            WHERE t.hash = free.hash
+            RETURNING t.address_id
+            """,
+            [last_slots[-1], addresses, first_slots, last_slots, timezone.now()],
+        )
+        address_counts = Counter(row[0] for row in cursor.fetchall())
+        add_claimed_tickets(address_counts)
+        return sum(address_counts.values())
+
+
+def _write_allocation(addresses, first_slots, last_slots):
+    now = timezone.now()
+    address_counts = {}
+    with transaction.atomic():
+        hashes = list(
+            get_free_ticket_pool()
+            .select_for_update(skip_locked=True)
+            .values_list("hash", flat=True)[: last_slots[-1]]
+        )
+        for address, first_slot, last_slot in zip(addresses, first_slots, last_slots):
+            address_counts[address] = Ticket.objects.filter(
+                hash__in=hashes[first_slot:last_slot]
+            ).update(address_id=address, updated_at=now)
+        add_claimed_tickets(address_counts)
+    return sum(address_counts.values())
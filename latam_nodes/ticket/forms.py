@@ -1,6 +1,5 @@
 from django import forms
 from .models import Jackpot
-from .utils import get_total_ticket_count
 from latam_nodes.delegator.utils import get_total_delegation_amount
 
 class JackpotForm(forms.ModelForm):
@@ -8,17 +7,24 @@ class JackpotForm(forms.ModelForm):
         model = Jackpot
         fields = '__all__'
 
-    def clean_ticket_cost(self):
-        ticket_cost = self.cleaned_data.get('ticket_cost')
+    def clean(self):
+        cleaned_data = super().clean()
+        if 'ticket_cost' not in cleaned_data:
+            return cleaned_data
+        ticket_cost = cleaned_data['ticket_cost']
         total_delegation_amount = get_total_delegation_amount()
-        ticket_number = get_total_ticket_count()
-        
-        if total_delegation_amount == 0 or ticket_number == 0:
-            raise forms.ValidationError("There are no ticker or no delegator. To create jackpot, please check ticket and delegators.")
-          
+        # The round's ticket space, not the current ticket table: the width
+        # can change with this jackpot and is read-only once it exists.
+        digits = cleaned_data.get('ticket_hash_width', self.instance.ticket_hash_width)
+        ticket_number = 16 ** digits
+
+        if total_delegation_amount == 0:
+            self.add_error('ticket_cost', "There are no delegators. To create jackpot, please check delegators.")
+            return cleaned_data
+
         calculate_ticket_cost = round(total_delegation_amount / ticket_number, 1)
-        
+
         if ticket_cost is None or ticket_cost < calculate_ticket_cost:
-            raise forms.ValidationError(f"Currently total delegation amount is { round(total_delegation_amount, 1) } and total ticket number is { ticket_number }. So you should set ticket cost to more than { calculate_ticket_cost }")
-          
-        return ticket_cost
+            self.add_error('ticket_cost', f"Currently total delegation amount is { round(total_delegation_amount, 1) } and total ticket number is { ticket_number }. So you should set ticket cost to more than { calculate_ticket_cost }")
+
+        return cleaned_data
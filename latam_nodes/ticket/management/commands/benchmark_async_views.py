@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from latam_nodes.base.benchmark import (
+    benchmark_database,
+    free_port,
+    http_request,
+    serve_wsgi,
+    server_process,
+    summarize,
+)
+from latam_nodes.base.fake_chain import FakeChain, make_delegations
+from latam_nodes.ticket.models import Participant
+
+ENDPOINTS = {
+    "check-address": ("/api/v1/ticket/check-address/", "/api/v1/ticket/async/check-address/"),
+    "participant-statistics": (
+        "/api/v1/ticket/participant-statistics/",
+        "/api/v1/ticket/async/participant-statistics/",
+    ),
+}
+
+
+async def run_load(port, path, addresses, concurrency):
+    """GET `path` once per address, at most `concurrency` requests in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    ok = 0
+
+    async def request(address):
+        nonlocal ok
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, _ = await http_request(
+                    port, "GET", f"{path}?{urlencode({'address': address})}"
+                )
+                ok += status == 200
+            except (OSError, ValueError, IndexError):
+                pass
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(address) for address in addresses))
+    return ok, time.perf_counter() - started, latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how many concurrent requests the WSGI and ASGI variants of the "
+        "chain-proxying endpoints serve when the LCD is slow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--latency", type=float, default=0.5, help="Seconds per fake LCD response."
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Request threads of the WSGI server."
+        )
+        parser.add_argument("--keepdb", action="store_true")
+        parser.add_argument(
+            "--serve-wsgi",
+            type=int,
+            metavar="PORT",
+            help="Internal: serve the project over WSGI on PORT and block.",
+        )
+
+    def handle(self, *args, **options):
+        if options["serve_wsgi"]:
+            serve_wsgi(options["serve_wsgi"], options["threads"])
+            return
+
+        delegations = make_delegations(options["requests"])
+        addresses = [d["delegation"]["delegator_address"] for d in delegations]
+
+        with benchmark_database(keepdb=options["keepdb"]):
+            Participant.objects.all().delete()
+            Participant.objects.bulk_create(
+                Participant(address=address, balance=1, is_active=True)
+                for address in addresses
+            )
+            with FakeChain(delegations=delegations, latency=options["latency"]) as chain:
+                env = {
+                    **os.environ,
+                    "DB_NAME": connection.settings_dict["NAME"],
+                    "CELESTIA_LCD_URLS": chain.url,
+                }
+                for endpoint, paths in ENDPOINTS.items():
+                    for name, path in (("wsgi", paths[0]), ("asgi", paths[1])):
+                        port = free_port()
+                        if name == "wsgi":
+                            command = [
+                                sys.executable,
+                                "manage.py",
+                                "benchmark_async_views",
+                                f"--serve-wsgi={port}",
+                                f"--threads={options['threads']}",
+                            ]
+                        else:
+                            command = [
+                                sys.executable,
+                                "-m",
+                                "uvicorn",
+                                "config.asgi:application",
+                                f"--port={port}",
+                                "--lifespan=off",
+                                "--log-level=warning",
+                            ]
+                        # Every address is requested once, so each request is a
+                        # cache miss that waits on the LCD.
+                        with server_process(command, port, env):
+                            ok, wall, latencies = asyncio.run(
+                                run_load(port, path, addresses, options["concurrency"])
+                            )
+                        stats = summarize(latencies)
+                        self.stdout.write(
+                            f"endpoint={endpoint:<22} server={name} "
+                            f"ok={ok}/{len(addresses)} wall={wall * 1000:.0f}ms "
+                            f"rps={len(addresses) / wall:.1f} p50={stats['p50']:.0f}ms "
+                            f"p95={stats['p95']:.0f}ms"
+                        )
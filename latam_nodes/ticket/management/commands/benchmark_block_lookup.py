@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from latam_nodes.base.benchmark import measure
+from latam_nodes.base.fake_chain import FakeChain, make_blocks
+from latam_nodes.ticket.blocks import BlockTimeResolver
+
+
+def find_closest_linear(resolver, target_time):
+    """The previous draw lookup: step back one height at a time from the tip."""
+    block = resolver.get_block()
+    best = block
+    while block.height > 1:
+        block = resolver.get_block(block.height - 1)
+        if abs((block.time - target_time).total_seconds()) > abs(
+            (best.time - target_time).total_seconds()
+        ):
+            break
+        best = block
+    return best
+
+
+class Command(BaseCommand):
+    help = (
+        "Count RPC requests needed to find the draw block when the draw task "
+        "runs late, for the linear walk and the bisecting resolver."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blocks", type=int, default=20000)
+        parser.add_argument(
+            "--lateness",
+            default="1,60,600",
+            help="Comma separated minutes between draw date and chain tip.",
+        )
+
+    def handle(self, *args, **options):
+        blocks = make_blocks(options["blocks"])
+        tip_time = blocks[-1]["time"]
+
+        with FakeChain(blocks=blocks) as chain, override_settings(
+            CELESTIA_RPC_URLS=[chain.url]
+        ):
+            resolver = BlockTimeResolver(cache=False)
+            for minutes in options["lateness"].split(","):
+                target_time = tip_time - timedelta(minutes=float(minutes))
+                results = {}
+                for name, find in (
+                    ("linear", lambda: find_closest_linear(resolver, target_time)),
+                    ("resolver", lambda: resolver.find_closest(target_time)),
+                ):
+                    chain.request_count = 0
+                    with measure() as result:
+                        results[name] = find()
+                    self.stdout.write(
+                        f"late={minutes:>5}min strategy={name:<8} "
+                        f"height={results[name].height} requests={chain.request_count} "
+                        f"wall={result['ms']:.0f}ms"
+                    )
+                if results["linear"].height != results["resolver"].height:
+                    self.stderr.write("Strategies disagree on the closest block")
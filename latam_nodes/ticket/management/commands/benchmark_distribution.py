@@ -0,0 +1,64 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from latam_nodes.base.benchmark import benchmark_database, measure
+from latam_nodes.ticket.distribution import apportion, distribute_free_tickets
+from latam_nodes.ticket.models import Participant, Ticket
+from latam_nodes.ticket.utils import generate_hex_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the proportional ticket distribution engine for growing numbers "
+        "of active participants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--participants",
+            default="10000,50000,100000",
+            help="Comma separated participant counts.",
+        )
+        parser.add_argument("--tickets", type=int, default=6553)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options["participants"].split(",")]
+        ticket_count = options["tickets"]
+
+        with benchmark_database(keepdb=options["keepdb"]):
+            Ticket.objects.bulk_create(
+                [
+                    Ticket(hash=hash, position=position)
+                    for position, hash in enumerate(generate_hex_hash())
+                ],
+                batch_size=1000,
+            )
+            for scale in scales:
+                Ticket.objects.update(address=None)
+                Participant.objects.all().delete()
+                Participant.objects.bulk_create(
+                    [
+                        Participant(
+                            address=f"celestia1bench{i:07d}",
+                            balance=random.lognormvariate(3, 2),
+                        )
+                        for i in range(scale)
+                    ],
+                    batch_size=1000,
+                )
+                balances = list(Participant.objects.values_list("balance", flat=True))
+
+                with measure() as engine:
+                    apportion(balances, ticket_count)
+                with measure() as total:
+                    assigned = distribute_free_tickets(
+                        Participant.objects.filter(is_active=True), ticket_count
+                    )
+
+                self.stdout.write(
+                    f"participants={scale:>7} assigned={assigned} "
+                    f"apportion={engine['ms']:.1f}ms "
+                    f"distribute={total['ms']:.1f}ms queries={total['queries']}"
+                )
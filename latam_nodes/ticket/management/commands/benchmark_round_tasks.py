@@ -0,0 +1,240 @@
+import json
+import random
+import statistics
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from latam_nodes.base.benchmark import benchmark_database, compare_to_baseline, measure
+from latam_nodes.base.fake_chain import FakeChain, make_blocks, make_delegations
+from latam_nodes.delegator.models import Delegator
+from latam_nodes.delegator.tasks import (
+    check_and_save_winner_task,
+    create_ticket,
+    distribute_ticket,
+    save_delegators_task,
+    update_ticket_cost_for_latest_jackpot,
+)
+from latam_nodes.ticket.distribution import distribute_free_tickets
+from latam_nodes.ticket.models import (
+    BlockHeader,
+    Jackpot,
+    Participant,
+    RoundAllocation,
+    Ticket,
+    Winner,
+)
+from latam_nodes.ticket.round_state import invalidate_round_state
+from latam_nodes.ticket.utils import regenerate_tickets, reset_round
+
+
+def prepare_save_delegators():
+    # The first sync of a round inserts every delegator.
+    Delegator.objects.all().delete()
+
+
+def prepare_distribute():
+    reset_round()
+    Participant.objects.update(is_active=True)
+    # Inside the distribution window and not yet distributed.
+    Jackpot.objects.update(
+        is_active=True,
+        distributed_status=False,
+        draw_date=timezone.now() + timedelta(minutes=30),
+    )
+    invalidate_round_state()
+
+
+def prepare_draw():
+    Winner.objects.all().delete()
+    RoundAllocation.objects.all().delete()
+    BlockHeader.objects.all().delete()
+    Jackpot.objects.update(is_active=True, draw_date=timezone.now() - timedelta(minutes=10))
+    if not Ticket.objects.filter(address__isnull=False).exists():
+        Participant.objects.update(is_active=True)
+        jackpot = Jackpot.objects.get()
+        distribute_free_tickets(
+            Participant.objects.filter(is_active=True),
+            Ticket.objects.count() * int(jackpot.winning_percentage) // 100,
+        )
+    invalidate_round_state()
+
+
+# In round order; each task runs on the state the previous ones leave behind,
+# after its own unmeasured preparation.
+TASKS = {
+    "save_delegators_task": (prepare_save_delegators, save_delegators_task),
+    "update_ticket_cost_for_latest_jackpot": (None, update_ticket_cost_for_latest_jackpot),
+    "create_ticket": (None, create_ticket),
+    "distribute_ticket": (prepare_distribute, distribute_ticket),
+    "check_and_save_winner_task": (prepare_draw, check_and_save_winner_task),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the round lifecycle Celery tasks on synthetic data at several "
+        "scales, record wall time, queries and peak memory as JSON and compare "
+        "the run with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delegators",
+            default="1000,10000,100000",
+            help="Comma separated delegator counts.",
+        )
+        parser.add_argument(
+            "--hash-widths", default="4,5,6", help="Comma separated ticket hash widths."
+        )
+        parser.add_argument(
+            "--tasks", default=",".join(TASKS), help="Comma separated task names."
+        )
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--baseline", help="Compare with results from this JSON file.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative growth that counts as a regression.",
+        )
+        parser.add_argument(
+            "--min-ms",
+            type=float,
+            default=5.0,
+            help="Ignore wall time growth smaller than this.",
+        )
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        tasks = options["tasks"].split(",")
+        unknown = set(tasks) - set(TASKS)
+        if unknown:
+            raise CommandError(f"Unknown task(s): {', '.join(sorted(unknown))}")
+        scales = [
+            (int(delegators), int(width))
+            for delegators in options["delegators"].split(",")
+            for width in options["hash_widths"].split(",")
+        ]
+
+        results = {}
+        with benchmark_database(keepdb=options["keepdb"]):
+            vendor = connection.vendor
+            for delegator_count, width in scales:
+                delegations = make_delegations(delegator_count)
+                chain = FakeChain(delegations=delegations, blocks=make_blocks(2000))
+                with chain, override_settings(
+                    CELESTIA_LCD_URLS=[chain.url], CELESTIA_RPC_URLS=[chain.url]
+                ):
+                    self.seed(delegations, width)
+                    for name in tasks:
+                        prepare, task = TASKS[name]
+                        case = f"{name}/delegators={delegator_count}/width={width}"
+                        results[case] = self.run(prepare, task, options["runs"])
+                        self.stdout.write(
+                            f"{case:<60} wall={results[case]['ms']:.0f}ms "
+                            f"queries={results[case]['queries']} "
+                            f"peak={results[case]['peak_mib']:.1f}MiB"
+                        )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {"vendor": vendor, "runs": options["runs"], "results": results},
+                    f,
+                    indent=2,
+                    sort_keys=True,
+                )
+        if options["baseline"]:
+            self.compare(options, vendor, results)
+
+    def seed(self, delegations, width):
+        """Start each scale from a fresh round at `width` with every delegator joined."""
+        rng = random.Random(0)
+        Ticket.objects.update(address=None)
+        for model in (Winner, RoundAllocation, BlockHeader, Jackpot, Participant, Delegator):
+            model.objects.all().delete()
+
+        # bulk_create sends no post_save, so no setup task is enqueued.
+        Jackpot.objects.bulk_create(
+            [
+                Jackpot(
+                    reward=1000,
+                    reward_percentage=100,
+                    winning_percentage=10,
+                    ticket_cost=1,
+                    ticket_hash_width=width,
+                    setup_status=Jackpot.SetupStatus.DONE,
+                    setup_progress=100,
+                    draw_date=timezone.now() + timedelta(minutes=30),
+                )
+            ]
+        )
+        if Ticket.objects.count() != 16 ** width:
+            regenerate_tickets(width)
+        Participant.objects.bulk_create(
+            [
+                Participant(
+                    address=delegation["delegation"]["delegator_address"],
+                    balance=rng.lognormvariate(3, 2),
+                )
+                for delegation in delegations
+            ],
+            batch_size=1000,
+        )
+        invalidate_round_state()
+
+    def run(self, prepare, task, runs):
+        """Median wall time of `runs` runs, then one more traced for peak memory."""
+        samples = []
+        for _ in range(runs):
+            if prepare:
+                prepare()
+            with measure() as result:
+                task()
+            samples.append(result)
+
+        # tracemalloc slows allocation-heavy code several times over, so the
+        # memory run is kept apart from the timed ones.
+        if prepare:
+            prepare()
+        tracemalloc.start()
+        try:
+            task()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {
+            "ms": statistics.median(sample["ms"] for sample in samples),
+            "queries": max(sample["queries"] for sample in samples),
+            "peak_mib": peak / 2 ** 20,
+        }
+
+    def compare(self, options, vendor, results):
+        with open(options["baseline"]) as f:
+            baseline = json.load(f)
+        if baseline.get("vendor") != vendor:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Baseline was recorded on {baseline.get('vendor')}, this run on {vendor}."
+                )
+            )
+
+        regressions = 0
+        for case, metric, before, after, regressed in compare_to_baseline(
+            baseline["results"], results, options["threshold"], options["min_ms"]
+        ):
+            change = (after - before) / before * 100 if before else 0
+            line = f"{case:<60} {metric:<8} {before:>10.1f} -> {after:>10.1f} ({change:+.0f}%)"
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line} REGRESSION"))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{regressions} metric(s) regressed against the baseline.")
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from latam_nodes.base.benchmark import benchmark_database, measure, summarize
+from latam_nodes.ticket.models import Ticket
+from latam_nodes.ticket.utils import generate_hex_hash, regenerate_tickets, reset_round
+
+
+def regenerate_with_models(digits):
+    """The previous create_ticket: delete, then bulk_create model instances."""
+    Ticket.objects.all().delete()
+    tickets = []
+    for position, hash in enumerate(generate_hex_hash(digits)):
+        tickets.append(Ticket(hash=hash, position=position))
+        if len(tickets) == 1000:
+            Ticket.objects.bulk_create(tickets)
+            tickets = []
+    if tickets:
+        Ticket.objects.bulk_create(tickets)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rebuilding the ticket table with model instances, rebuilding it "
+        "in SQL, and resetting the kept rows for a new round."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--digits", type=int, default=settings.TICKET_HASH_WIDTH)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        digits = options["digits"]
+        with benchmark_database(keepdb=options["keepdb"]):
+            for name, regenerate in (
+                ("models", regenerate_with_models),
+                ("sql", regenerate_tickets),
+                ("reset", lambda digits: reset_round()),
+            ):
+                samples = []
+                for _ in range(options["runs"]):
+                    with measure() as result:
+                        regenerate(digits)
+                    samples.append(result["ms"])
+                stats = summarize(samples)
+                self.stdout.write(
+                    f"strategy={name:<6} tickets={Ticket.objects.count()} "
+                    f"mean={stats['mean']:.0f}ms p50={stats['p50']:.0f}ms "
+                    f"max={stats['max']:.0f}ms queries={result['queries']}"
+                )
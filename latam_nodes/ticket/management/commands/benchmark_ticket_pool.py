@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from latam_nodes.base.benchmark import benchmark_database, measure, summarize
+from latam_nodes.ticket.models import Participant, Ticket
+from latam_nodes.ticket.utils import claim_tickets, generate_hex_hash
+
+
+@transaction.atomic
+def claim_random_tickets(participant, count):
+    tickets = list(
+        Ticket.objects.filter(address__isnull=True)
+        .order_by("?")
+        .select_for_update(skip_locked=True)[:count]
+    )
+    Ticket.objects.filter(hash__in=[ticket.hash for ticket in tickets]).update(
+        address=participant
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare join latency of ORDER BY random() ticket picking with the "
+        "pre-shuffled free pool for several ticket table sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="4096,16384,65536", help="Comma separated table sizes."
+        )
+        parser.add_argument("--joins", type=int, default=50)
+        parser.add_argument("--tickets-per-join", type=int, default=20)
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        joins = options["joins"]
+        per_join = options["tickets_per_join"]
+
+        with benchmark_database(keepdb=options["keepdb"]):
+            participants = Participant.objects.bulk_create(
+                [
+                    Participant(address=f"celestia1bench{i:06d}", balance=1)
+                    for i in range(joins)
+                ]
+            )
+            for size in sizes:
+                hashes = generate_hex_hash()[:size]
+                Ticket.objects.all().delete()
+                Ticket.objects.bulk_create(
+                    [
+                        Ticket(hash=hash, position=position)
+                        for position, hash in enumerate(hashes)
+                    ],
+                    batch_size=1000,
+                )
+                for name, claim in (
+                    ("random", claim_random_tickets),
+                    ("pool", claim_tickets),
+                ):
+                    Ticket.objects.update(address=None)
+                    samples = []
+                    for participant in participants:
+                        with measure() as result:
+                            claim(participant, per_join)
+                        samples.append(result["ms"])
+                    stats = summarize(samples)
+                    self.stdout.write(
+                        f"size={size:>6} strategy={name:<6} "
+                        f"mean={stats['mean']:.2f}ms p50={stats['p50']:.2f}ms "
+                        f"max={stats['max']:.2f}ms"
+                    )
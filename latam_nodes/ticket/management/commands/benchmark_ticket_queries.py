@@ -0,0 +1,124 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from latam_nodes.base.benchmark import benchmark_database, measure, summarize
+from latam_nodes.ticket.models import Participant, Ticket
+from latam_nodes.ticket.utils import claim_tickets, generate_hex_hash, get_free_ticket_pool
+
+# The single-column indexes Ticket had before the composite and partial ones.
+OLD_INDEXES = {
+    "bench_ticket_address_id": "address_id",
+    "bench_ticket_position": "position",
+}
+
+
+def hot_queries(address):
+    return {
+        "free_pool_head": lambda: list(
+            get_free_ticket_pool().values_list("hash", flat=True)[:20]
+        ),
+        "free_count": lambda: Ticket.objects.filter(address__isnull=True).count(),
+        "claimed_count": lambda: Ticket.objects.filter(address__isnull=False).count(),
+        "by_address_page": lambda: list(
+            Ticket.objects.filter(address_id=address)
+            .order_by("hash")
+            .values_list("hash", flat=True)[:25]
+        ),
+        "by_address_all": lambda: list(
+            Ticket.objects.filter(address_id=address)
+            .order_by("hash")
+            .values_list("hash", flat=True)
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot Ticket queries on a fully populated ticket table with the "
+        "old single-column indexes and with the composite and partial ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--participants", type=int, default=500)
+        parser.add_argument(
+            "--claimed", type=float, default=0.5, help="Share of tickets claimed."
+        )
+        parser.add_argument("--runs", type=int, default=50)
+        parser.add_argument("--explain", action="store_true")
+        parser.add_argument("--keepdb", action="store_true")
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options["keepdb"]):
+            hashes = generate_hex_hash()
+            Ticket.objects.all().delete()
+            Ticket.objects.bulk_create(
+                [Ticket(hash=hash, position=position) for position, hash in enumerate(hashes)],
+                batch_size=5000,
+            )
+            participants = Participant.objects.bulk_create(
+                [
+                    Participant(address=f"celestia1bench{i:06d}", balance=1)
+                    for i in range(options["participants"])
+                ]
+            )
+            per_participant = int(len(hashes) * options["claimed"]) // len(participants)
+            for participant in participants:
+                claim_tickets(participant, per_participant)
+            # A whale-sized holder is the worst case for the by-address queries.
+            address = participants[0].address
+
+            self.report("after", hot_queries(address), options)
+            self.use_old_indexes()
+            try:
+                self.report("before", hot_queries(address), options)
+            finally:
+                self.use_new_indexes()
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Sets the visibility map so index-only scans are possible.
+                cursor.execute(f"VACUUM ANALYZE {Ticket._meta.db_table}")
+            else:
+                cursor.execute("ANALYZE")
+
+    def report(self, label, queries, options):
+        self.analyze()
+        for name, query in queries.items():
+            samples = []
+            for _ in range(options["runs"]):
+                with measure() as result:
+                    query()
+                samples.append(result["ms"])
+            stats = summarize(samples)
+            self.stdout.write(
+                f"indexes={label:<6} query={name:<16} mean={stats['mean']:.2f}ms "
+                f"p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms"
+            )
+            if options["explain"]:
+                with CaptureQueriesContext(connection) as captured:
+                    query()
+                explain = "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite" else "EXPLAIN"
+                with connection.cursor() as cursor:
+                    cursor.execute(f"{explain} {captured[-1]['sql']}")
+                    for row in cursor.fetchall():
+                        self.stdout.write(f"    {row[-1]}")
+
+    def use_old_indexes(self):
+        with connection.schema_editor() as editor:
+            for index in Ticket._meta.indexes:
+                editor.remove_index(Ticket, index)
+        with connection.cursor() as cursor:
+            for name, column in OLD_INDEXES.items():
+                cursor.execute(
+                    f"CREATE INDEX {name} ON {Ticket._meta.db_table} ({column})"
+                )
+
+    def use_new_indexes(self):
+        with connection.cursor() as cursor:
+            for name in OLD_INDEXES:
+                cursor.execute(f"DROP INDEX {name}")
+        with connection.schema_editor() as editor:
+            for index in Ticket._meta.indexes:
+                editor.add_index(Ticket, index)
@@ -0,0 +1,335 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import ROUND_UP, Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count, F
+from django.utils import timezone
+
+from latam_nodes.base.benchmark import (
+    benchmark_database,
+    free_port,
+    http_request,
+    serve_wsgi,
+    server_process,
+    summarize,
+)
+from latam_nodes.base.fake_chain import FakeChain, make_delegations
+from latam_nodes.delegator.models import Delegator
+from latam_nodes.ticket.models import Jackpot, Participant, Ticket
+from latam_nodes.ticket.round_state import invalidate_round_state
+from latam_nodes.ticket.utils import start_round
+
+JOIN_PATH = "/api/v1/ticket/check-update-address/"
+
+
+class LockWaitSampler(threading.Thread):
+    """
+    Poll pg_stat_activity for backends waiting on a lock while the load runs.
+
+    Reports the peak number of waiting backends and the summed wait time
+    estimated from the samples. Only PostgreSQL exposes this.
+    """
+
+    interval = 0.02
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.peak = 0
+        self.wait_seconds = 0.0
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.wait(self.interval):
+                    cursor.execute(
+                        """
+                        SELECT count(*) FROM pg_stat_activity
+                        WHERE datname = current_database() AND wait_event_type = 'Lock'
+                        """
+                    )
+                    waiting = cursor.fetchone()[0]
+                    self.peak = max(self.peak, waiting)
+                    self.wait_seconds += waiting * self.interval
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def build_schedule(delegators, options, rng):
+    """
+    Return the join attempts as (offset seconds, kind, address), by arrival.
+
+    Every delegator joins once at a uniformly random time within the ramp.
+    `repeat` of them post again shortly after (double clicks, retries) and
+    `unknown` extra attempts come from addresses the Delegator table does
+    not know, half of which the LCD reports as staked elsewhere.
+    """
+    ramp = options["ramp"]
+    schedule = []
+    for address in delegators:
+        offset = rng.uniform(0, ramp)
+        schedule.append((offset, "join", address))
+        if rng.random() < options["repeat"]:
+            schedule.append((offset + rng.uniform(0, 0.5), "repeat", address))
+
+    unknown = int(len(delegators) * options["unknown"])
+    elsewhere = make_delegations(unknown // 2)
+    for delegation in elsewhere:
+        address = delegation["delegation"]["delegator_address"]
+        schedule.append((rng.uniform(0, ramp), "unknown", address))
+    for i in range(unknown - len(elsewhere)):
+        schedule.append((rng.uniform(0, ramp), "unknown", f"celestia1nobody{i:08d}"))
+
+    schedule.sort()
+    return schedule, elsewhere
+
+
+async def replay(port, schedule, concurrency):
+    """POST each join at its arrival time, at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    started = time.perf_counter()
+
+    async def join(offset, kind, address):
+        await asyncio.sleep(max(started + offset - time.perf_counter(), 0))
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                status, _ = await http_request(
+                    port,
+                    "POST",
+                    JOIN_PATH,
+                    json.dumps({"address": address}).encode(),
+                    "application/json",
+                )
+            except (OSError, ValueError, IndexError):
+                status = None
+            results.append((kind, status, (time.perf_counter() - sent) * 1000))
+
+    await asyncio.gather(*(join(*attempt) for attempt in schedule))
+    return results, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a burst of concurrent joins against check-update-address with "
+        "seeded delegators and a fake LCD, then report latency, throughput, lock "
+        "waits and whether any ticket invariant was broken."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delegators", type=int, default=2000)
+        parser.add_argument(
+            "--ramp",
+            type=float,
+            default=5.0,
+            help="Seconds over which the joins arrive; 0 sends them all at once.",
+        )
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument(
+            "--repeat", type=float, default=0.1, help="Share of delegators posting twice."
+        )
+        parser.add_argument(
+            "--unknown",
+            type=float,
+            default=0.1,
+            help="Extra joins from unknown addresses, as a share of delegators.",
+        )
+        parser.add_argument(
+            "--demand",
+            type=float,
+            default=2.0,
+            help="Tickets the delegators could claim, as a multiple of the round's capacity.",
+        )
+        parser.add_argument("--hash-width", type=int, default=4)
+        parser.add_argument("--winning-percentage", type=int, default=50)
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds per LCD response.")
+        parser.add_argument("--server", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument(
+            "--threads", type=int, default=16, help="Request threads of the WSGI server."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keepdb", action="store_true")
+        parser.add_argument(
+            "--serve-wsgi",
+            type=int,
+            metavar="PORT",
+            help="Internal: serve the project over WSGI on PORT and block.",
+        )
+
+    def handle(self, *args, **options):
+        if options["serve_wsgi"]:
+            serve_wsgi(options["serve_wsgi"], options["threads"])
+            return
+
+        rng = random.Random(options["seed"])
+        with benchmark_database(keepdb=options["keepdb"]):
+            jackpot, delegators = self.seed(rng, options)
+            schedule, elsewhere = build_schedule(delegators, options, rng)
+
+            with FakeChain(delegations=elsewhere, latency=options["latency"]) as chain:
+                port = free_port()
+                env = {
+                    **os.environ,
+                    "DB_NAME": connection.settings_dict["NAME"],
+                    "CELESTIA_LCD_URLS": chain.url,
+                }
+                sampler = LockWaitSampler() if connection.vendor == "postgresql" else None
+                with server_process(self.server_command(port, options), port, env):
+                    if sampler:
+                        sampler.start()
+                    try:
+                        results, wall = asyncio.run(
+                            replay(port, schedule, options["concurrency"])
+                        )
+                    finally:
+                        if sampler:
+                            sampler.stop()
+
+            self.report(results, wall, sampler)
+            failures = self.check_invariants(jackpot)
+        if failures:
+            raise CommandError(f"Join rush broke {failures} ticket invariant(s).")
+
+    def server_command(self, port, options):
+        if options["server"] == "wsgi":
+            return [
+                sys.executable,
+                "manage.py",
+                "loadtest_join_rush",
+                f"--serve-wsgi={port}",
+                f"--threads={options['threads']}",
+            ]
+        return [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "config.asgi:application",
+            f"--port={port}",
+            "--lifespan=off",
+            "--log-level=warning",
+        ]
+
+    def seed(self, rng, options):
+        digits = options["hash_width"]
+        Delegator.objects.all().delete()
+        Participant.objects.all().delete()
+        Jackpot.objects.all().delete()
+
+        # Heavy-tailed stakes, so a few whales compete with many small holders.
+        delegators = Delegator.objects.bulk_create(
+            Delegator(
+                address=f"celestia1rush{i:010d}",
+                balance=round(rng.paretovariate(1.2) * 10, 6),
+            )
+            for i in range(options["delegators"])
+        )
+
+        capacity = 16 ** digits * options["winning_percentage"] // 100
+        total_stake = Decimal(sum(d.balance for d in delegators))
+        ticket_cost = max(
+            (total_stake / Decimal(capacity * options["demand"])).quantize(
+                Decimal("0.01"), rounding=ROUND_UP
+            ),
+            Decimal("0.01"),
+        )
+        # bulk_create sends no post_save, so the round is set up inline here
+        # instead of by the setup task.
+        Jackpot.objects.bulk_create(
+            [
+                Jackpot(
+                    reward=1000,
+                    reward_percentage=100,
+                    winning_percentage=options["winning_percentage"],
+                    ticket_cost=ticket_cost,
+                    ticket_hash_width=digits,
+                    setup_status=Jackpot.SetupStatus.DONE,
+                    setup_progress=100,
+                    draw_date=timezone.now() + timedelta(days=1),
+                )
+            ]
+        )
+        jackpot = Jackpot.objects.get()
+        start_round(digits)
+        invalidate_round_state()
+
+        self.stdout.write(
+            f"delegators={len(delegators)} tickets={16 ** digits} capacity={capacity} "
+            f"ticket_cost={ticket_cost} demand={float(total_stake / ticket_cost) / capacity:.2f}x"
+        )
+        return jackpot, [d.address for d in delegators]
+
+    def report(self, results, wall, sampler):
+        stats = summarize([ms for _, _, ms in results])
+        statuses = Counter(status for _, status, _ in results)
+        self.stdout.write(
+            f"requests={len(results)} wall={wall * 1000:.0f}ms "
+            f"rps={len(results) / wall:.1f} mean={stats['mean']:.0f}ms "
+            f"p50={stats['p50']:.0f}ms p95={stats['p95']:.0f}ms "
+            f"p99={stats['p99']:.0f}ms max={stats['max']:.0f}ms"
+        )
+        for kind in ("join", "repeat", "unknown"):
+            kind_results = [(status, ms) for k, status, ms in results if k == kind]
+            if not kind_results:
+                continue
+            kind_stats = summarize([ms for _, ms in kind_results])
+            kind_statuses = Counter(status for status, _ in kind_results)
+            self.stdout.write(
+                f"  kind={kind:<7} requests={len(kind_results)} "
+                f"p50={kind_stats['p50']:.0f}ms p99={kind_stats['p99']:.0f}ms "
+                f"statuses={dict(sorted(kind_statuses.items(), key=str))}"
+            )
+        errors = sum(n for status, n in statuses.items() if status is None or status >= 500)
+        self.stdout.write(f"server_errors={errors}")
+        if sampler:
+            self.stdout.write(
+                f"lock_waits peak_waiting={sampler.peak} "
+                f"total={sampler.wait_seconds * 1000:.0f}ms"
+            )
+        else:
+            self.stdout.write(f"lock_waits not observable on {connection.vendor}")
+
+    def check_invariants(self, jackpot):
+        jackpot.refresh_from_db()
+        claimed = Ticket.objects.filter(address__isnull=False).count()
+        capacity = Ticket.objects.count() * jackpot.winning_percentage // 100
+        held = Participant.objects.annotate(held=Count("tickets"))
+        # A ticket claimed twice ends with one holder, so the loser's counter
+        # stays above the tickets it actually holds.
+        double_assigned = held.filter(ticket_count__gt=F("held")).count()
+        drifted = held.exclude(ticket_count=F("held")).count()
+        # Entitlement as the view computes it, from the delegator's stake.
+        stakes = dict(Delegator.objects.values_list("address", "balance"))
+        over_entitled = sum(
+            1
+            for address, count in held.filter(held__gt=0).values_list("address", "held")
+            if count > stakes.get(address, 0) // float(jackpot.ticket_cost)
+        )
+
+        checks = [
+            (f"claimed={claimed} capacity={capacity}", claimed <= capacity),
+            (f"double_assigned_participants={double_assigned}", not double_assigned),
+            (f"participant_counters_drifted={drifted}", not drifted),
+            (
+                f"round_counter={jackpot.claimed_ticket_count} claimed={claimed}",
+                jackpot.claimed_ticket_count == claimed,
+            ),
+            (f"participants_over_entitlement={over_entitled}", not over_entitled),
+        ]
+        for label, passed in checks:
+            status = self.style.SUCCESS("ok") if passed else self.style.ERROR("FAIL")
+            self.stdout.write(f"check {label} {status}")
+        return sum(not passed for _, passed in checks)
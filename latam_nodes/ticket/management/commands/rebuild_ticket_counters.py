@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from latam_nodes.ticket.models import Jackpot, Participant, Ticket
+from latam_nodes.ticket.round_state import active_jackpot_ids, invalidate_round_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Participant.ticket_count and the active jackpot's "
+        "claimed_ticket_count with the ticket table and rebuild them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatches; exit with an error if any are found.",
+        )
+
+    def handle(self, *args, **options):
+        held_tickets = Coalesce(
+            Subquery(
+                Ticket.objects.filter(address=OuterRef("pk"))
+                .order_by()
+                .values("address")
+                .annotate(count=Count("hash"))
+                .values("count"),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+        with transaction.atomic():
+            drifted_participants = (
+                Participant.objects.annotate(held_tickets=held_tickets)
+                .exclude(ticket_count=held_tickets)
+                .count()
+            )
+            claimed_tickets = Ticket.objects.filter(address__isnull=False).count()
+            drifted_jackpots = (
+                Jackpot.objects.filter(pk__in=active_jackpot_ids())
+                .exclude(claimed_ticket_count=claimed_tickets)
+                .count()
+            )
+            self.stdout.write(
+                f"{drifted_participants} participant counter(s) and "
+                f"{drifted_jackpots} round counter(s) out of sync."
+            )
+
+            if options["check"]:
+                if drifted_participants or drifted_jackpots:
+                    raise CommandError("Ticket counters are inconsistent.")
+                return
+
+            Participant.objects.update(ticket_count=held_tickets)
+            Jackpot.objects.filter(pk__in=active_jackpot_ids()).update(
+                claimed_ticket_count=claimed_tickets
+            )
+            invalidate_round_state()
+        self.stdout.write(self.style.SUCCESS("Ticket counters rebuilt."))
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.19 on 2026-10-18 10:12
+
+import random
+
+from django.db import migrations, models
+
+
+def shuffle_existing_tickets(apps, schema_editor):
+    Ticket = apps.get_model("ticket", "Ticket")
+    hashes = list(Ticket.objects.values_list("hash", flat=True))
+    random.shuffle(hashes)
+
+    batch_size = 1000
+    tickets = []
+    for position, hash in enumerate(hashes):
+        tickets.append(Ticket(hash=hash, position=position))
+        if len(tickets) == batch_size:
+            Ticket.objects.bulk_update(tickets, ["position"])
+            tickets = []
+    if tickets:
+        Ticket.objects.bulk_update(tickets, ["position"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0023_rename_distribute_status_jackpot_distributed_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='position',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(shuffle_existing_tickets, migrations.RunPython.noop),
+    ]
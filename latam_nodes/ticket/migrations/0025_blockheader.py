@@ -0,0 +1,21 @@
+# Generated by Django 3.2.19 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0024_ticket_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockHeader',
+            fields=[
+                ('height', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hash', models.CharField(max_length=64)),
+                ('time', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.19 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0025_blockheader'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='hash',
+            field=models.CharField(max_length=8, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='winner',
+            name='ticket_hash',
+            field=models.CharField(blank=True, max_length=8, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.19 on 2026-10-18 12:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_claimed_tickets(apps, schema_editor):
+    Jackpot = apps.get_model("ticket", "Jackpot")
+    Participant = apps.get_model("ticket", "Participant")
+    Ticket = apps.get_model("ticket", "Ticket")
+
+    held_tickets = (
+        Ticket.objects.filter(address__isnull=False)
+        .values_list("address")
+        .annotate(count=Count("hash"))
+    )
+    for address, count in held_tickets:
+        Participant.objects.filter(pk=address).update(ticket_count=count)
+
+    active_jackpot = Jackpot.objects.filter(is_active=True).order_by("-draw_date").first()
+    if active_jackpot:
+        active_jackpot.claimed_ticket_count = Ticket.objects.filter(
+            address__isnull=False
+        ).count()
+        active_jackpot.save(update_fields=["claimed_ticket_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0026_widen_ticket_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jackpot',
+            name='claimed_ticket_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='ticket_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_claimed_tickets, migrations.RunPython.noop),
+    ]
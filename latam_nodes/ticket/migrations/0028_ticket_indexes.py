@@ -0,0 +1,33 @@
+# Generated by Django 3.2.19 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0027_ticket_counters'),
+    ]
+
+    operations = [
+        # Build the new indexes before dropping the ones they replace.
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['address', 'hash'], name='ticket_address_hash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('address__isnull', True)), fields=['position'], name='ticket_free_position_idx'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='address',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tickets', to='ticket.participant'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
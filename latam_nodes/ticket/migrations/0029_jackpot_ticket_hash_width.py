@@ -0,0 +1,20 @@
+# Generated by Django 3.2.19 on 2026-10-18 13:40
+
+import django.core.validators
+from django.db import migrations, models
+import latam_nodes.ticket.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0028_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jackpot',
+            name='ticket_hash_width',
+            field=models.PositiveSmallIntegerField(default=latam_nodes.ticket.models.default_ticket_hash_width, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.19 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0029_jackpot_ticket_hash_width'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant_address', models.CharField(max_length=100)),
+                ('ticket_count', models.PositiveIntegerField()),
+                ('digits', models.PositiveSmallIntegerField()),
+                ('packed_tickets', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('jackpot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='ticket.jackpot')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='roundallocation',
+            index=models.Index(fields=['participant_address', '-created_at', '-id'], name='allocation_address_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='roundallocation',
+            constraint=models.UniqueConstraint(fields=('jackpot', 'participant_address'), name='round_allocation_unique'),
+        ),
+    ]
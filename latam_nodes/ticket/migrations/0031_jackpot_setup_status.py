@@ -0,0 +1,39 @@
+# Generated by Django 3.2.19 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0030_roundallocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jackpot',
+            name='setup_error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        # Existing jackpots were set up inline by the old signal.
+        migrations.AddField(
+            model_name='jackpot',
+            name='setup_progress',
+            field=models.PositiveSmallIntegerField(default=100, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jackpot',
+            name='setup_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='done', editable=False, max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='jackpot',
+            name='setup_progress',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='jackpot',
+            name='setup_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', editable=False, max_length=16),
+        ),
+    ]
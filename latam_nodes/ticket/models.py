@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 
 from django.db import models
@@ -9,26 +10,54 @@ from latam_nodes.base.models import BaseModel
 class Participant(BaseModel):
     address = models.CharField(max_length=100, primary_key=True)
     balance = models.DecimalField(max_digits=100, decimal_places=20, null=True)
+    # Tickets held this round, maintained by the claim and reset paths.
+    ticket_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.address
 
 
 class Ticket(BaseModel):
-    hash = models.CharField(max_length=4, primary_key=True)
+    hash = models.CharField(max_length=8, primary_key=True)
+    # Slot in the round's shuffled free pool; claims take the lowest free slots.
+    position = models.PositiveIntegerField(default=0)
+    # Indexed by ticket_address_hash_idx below.
     address = models.ForeignKey(
         Participant,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
         related_name="tickets",
+        db_index=False,
     )
 
+    class Meta:
+        indexes = [
+            # Serves lookups by address ordered by hash from the index alone.
+            models.Index(fields=["address", "hash"], name="ticket_address_hash_idx"),
+            # Only free tickets are ever ordered by position.
+            models.Index(
+                fields=["position"],
+                name="ticket_free_position_idx",
+                condition=models.Q(address__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return self.hash
 
 
+def default_ticket_hash_width():
+    return settings.TICKET_HASH_WIDTH
+
+
 class Jackpot(BaseModel):
+    class SetupStatus(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
     reward = models.DecimalField(
         max_digits=100, decimal_places=20, validators=[MinValueValidator(0)], null=True
     )
@@ -55,6 +84,23 @@ class Jackpot(BaseModel):
         blank=True,
     )
     distributed_status = models.BooleanField(default=False)
+    # Hex digits per ticket hash: the round has 16**ticket_hash_width tickets.
+    # Capped at 6 (16.7M rows); Ticket.hash would allow 8.
+    ticket_hash_width = models.PositiveSmallIntegerField(
+        default=default_ticket_hash_width,
+        validators=[MinValueValidator(1), MaxValueValidator(6)],
+    )
+    # Progress of the round setup task (tasks.setup_jackpot_round).
+    setup_status = models.CharField(
+        max_length=16,
+        choices=SetupStatus.choices,
+        default=SetupStatus.PENDING,
+        editable=False,
+    )
+    setup_progress = models.PositiveSmallIntegerField(default=0, editable=False)
+    setup_error = models.TextField(blank=True, editable=False)
+    # Tickets claimed during this round, maintained by the claim paths.
+    claimed_ticket_count = models.PositiveIntegerField(default=0, editable=False)
     draw_date = models.DateTimeField(default=timezone.now)
 
     def formatted_date(self):
@@ -65,7 +111,7 @@ class Jackpot(BaseModel):
 
 
 class Winner(BaseModel):
-    ticket_hash = models.CharField(max_length=4, blank=True, null=True)
+    ticket_hash = models.CharField(max_length=8, blank=True, null=True)
     closest_block_hash_date = models.DateTimeField(blank=True, null=True)
     participant_address = models.CharField(max_length=100, blank=True, null=True)
     jackpot = models.OneToOneField(
@@ -80,3 +126,51 @@ class Winner(BaseModel):
 
     def __str__(self):
         return f"{self.ticket_hash} - {self.participant_address} - {self.jackpot}"
+
+
+class BlockHeader(models.Model):
+    """Chain block headers fetched while resolving draws, keyed by height."""
+
+    height = models.BigIntegerField(primary_key=True)
+    hash = models.CharField(max_length=64)
+    time = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.height} - {self.hash}"
+
+
+class RoundAllocation(models.Model):
+    """
+    Tickets a participant held in a finished round, one row per participant.
+
+    Written in bulk at draw time, before the ticket table is reset, and never
+    updated. `packed_tickets` holds the sorted ticket values, delta encoded
+    and zlib-compressed (see utils.pack_ticket_hashes).
+    """
+
+    jackpot = models.ForeignKey(
+        Jackpot, on_delete=models.CASCADE, related_name="allocations"
+    )
+    participant_address = models.CharField(max_length=100)
+    ticket_count = models.PositiveIntegerField()
+    digits = models.PositiveSmallIntegerField()
+    packed_tickets = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["jackpot", "participant_address"],
+                name="round_allocation_unique",
+            ),
+        ]
+        indexes = [
+            # A participant's history, newest round first.
+            models.Index(
+                fields=["participant_address", "-created_at", "-id"],
+                name="allocation_address_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.participant_address} - {self.jackpot} - {self.ticket_count}"
@@ -0,0 +1,63 @@
+import hashlib
+import secrets
+
+
+class TicketPermutation:
+    """
+    Keyed bijection between positions and ticket values in the 16**digits space.
+
+    A balanced Feistel network over the 4*digits-bit index, with keyed
+    BLAKE2b as the round function. The ticket at any position, and the
+    position of any ticket, is computed on its own, so a shuffled ticket space
+    of millions of hashes never has to be built in memory.
+
+    The same key always gives the same order; a random key is drawn when none
+    is given. The key is not stored: it only deals the ticket table's
+    `position` column (see utils.shuffle_ticket_pool), which is then the
+    round's order.
+    """
+
+    rounds = 4
+
+    def __init__(self, digits, key=None):
+        self.digits = digits
+        self.size = 16 ** digits
+        # 4 * digits bits is always even, so the halves are equal and the
+        # network maps the space onto itself without cycle walking.
+        self.half_bits = 2 * digits
+        self.half_mask = (1 << self.half_bits) - 1
+        self.key = key if key is not None else secrets.token_bytes(16)
+        # Copying a keyed hasher skips the key setup on every call.
+        self.hasher = hashlib.blake2b(key=self.key, digest_size=4)
+
+    def round_function(self, round, value):
+        hasher = self.hasher.copy()
+        hasher.update(bytes([round]) + value.to_bytes(4, "big"))
+        return int.from_bytes(hasher.digest(), "big") & self.half_mask
+
+    def ticket_at(self, position):
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        left, right = position >> self.half_bits, position & self.half_mask
+        for round in range(self.rounds):
+            left, right = right, left ^ self.round_function(round, right)
+        return (left << self.half_bits) | right
+
+    def position_of(self, value):
+        if not 0 <= value < self.size:
+            raise IndexError(value)
+        left, right = value >> self.half_bits, value & self.half_mask
+        for round in reversed(range(self.rounds)):
+            left, right = right ^ self.round_function(round, left), left
+        return (left << self.half_bits) | right
+
+    def hash_at(self, position):
+        return f"{self.ticket_at(position):0{self.digits}X}"
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """Yield the ticket hashes in permuted order, one at a time."""
+        for position in range(self.size):
+            yield self.hash_at(position)
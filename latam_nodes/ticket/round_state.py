@@ -0,0 +1,207 @@
+"""
+Shared snapshot of the current round for the public ticket endpoints.
+
+The active jackpot and the ticket counts are kept in one Redis hash so hot
+endpoints do not run COUNT(*) on every hit. Claim paths maintain the
+database counters transactionally and bump the snapshot after commit;
+jackpot saves and round resets drop the snapshot. If Redis is unreachable
+the state is computed from the database.
+
+The snapshot is for display only. A claim that commits while a request is
+refilling it is lost until the key expires, so the join's capacity check
+reads the jackpot row instead (see utils.claim_round_tickets).
+
+The jackpot is stored as JSON scalars, not a pickled model instance: the
+Redis is shared with the Celery broker, and a pickle would outlive changes
+to the Jackpot model. The key is namespaced by database name, so benchmarks
+running against a throwaway database never touch the live snapshot.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from redis.exceptions import RedisError
+
+from latam_nodes.base.cache import get_redis
+
+from .models import Jackpot, Participant, Ticket
+
+DECIMAL_FIELDS = ("ticket_cost", "winning_percentage", "reward", "reward_percentage")
+
+# Only bump the counter of an existing snapshot; a missing one is rebuilt.
+INCREMENT_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("HINCRBY", KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
+
+
+class RoundJackpot(
+    namedtuple(
+        "RoundJackpot",
+        [
+            "id",
+            "ticket_cost",
+            "winning_percentage",
+            "distributed_status",
+            "draw_date",
+            "reward",
+            "reward_percentage",
+            "setup_status",
+        ],
+    )
+):
+    """The fields of the active jackpot that the public endpoints read."""
+
+    @classmethod
+    def from_jackpot(cls, jackpot):
+        return cls(*(getattr(jackpot, field) for field in cls._fields))
+
+    def dumps(self):
+        data = self._asdict()
+        for field in DECIMAL_FIELDS:
+            if data[field] is not None:
+                data[field] = str(data[field])
+        data["draw_date"] = self.draw_date.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, value):
+        data = json.loads(value)
+        for field in DECIMAL_FIELDS:
+            if data[field] is not None:
+                data[field] = Decimal(data[field])
+        data["draw_date"] = datetime.fromisoformat(data["draw_date"])
+        return cls(**data)
+
+
+def round_state_key():
+    return f"ticket:round-state:{connection.settings_dict['NAME']}"
+
+
+class RoundState:
+    def __init__(self, jackpot, total_tickets, claimed_tickets):
+        self.jackpot = jackpot
+        self.total_tickets = total_tickets
+        self.claimed_tickets = claimed_tickets
+
+    @property
+    def is_open(self):
+        """Whether tickets can be claimed: the jackpot's round setup is done."""
+        return (
+            self.jackpot is not None
+            and self.jackpot.setup_status == Jackpot.SetupStatus.DONE
+        )
+
+    @property
+    def ticket_capacity(self):
+        """Tickets handed out this round: `winning_percentage` of the space."""
+        if not self.is_open:
+            return 0
+        return self.total_tickets * self.jackpot.winning_percentage // 100
+
+
+def load_round_state():
+    jackpot = Jackpot.objects.order_by("-draw_date").filter(is_active=True).first()
+    return RoundState(
+        jackpot=RoundJackpot.from_jackpot(jackpot) if jackpot else None,
+        total_tickets=Ticket.objects.count(),
+        claimed_tickets=jackpot.claimed_ticket_count if jackpot else 0,
+    )
+
+
+def get_round_state():
+    try:
+        cached = get_redis().hgetall(round_state_key())
+    except RedisError:
+        return load_round_state()
+
+    if cached:
+        jackpot = cached[b"jackpot"]
+        return RoundState(
+            jackpot=RoundJackpot.loads(jackpot) if jackpot else None,
+            total_tickets=int(cached[b"total_tickets"]),
+            claimed_tickets=int(cached[b"claimed_tickets"]),
+        )
+
+    state = load_round_state()
+    try:
+        key = round_state_key()
+        pipeline = get_redis().pipeline()
+        pipeline.hset(
+            key,
+            mapping={
+                "jackpot": state.jackpot.dumps() if state.jackpot else "",
+                "total_tickets": state.total_tickets,
+                "claimed_tickets": state.claimed_tickets,
+            },
+        )
+        pipeline.expire(key, settings.ROUND_STATE_TTL)
+        pipeline.execute()
+    except RedisError:
+        pass
+    return state
+
+
+def _increment_claimed_tickets(count):
+    try:
+        get_redis().eval(
+            INCREMENT_SCRIPT, 1, round_state_key(), "claimed_tickets", count
+        )
+    except RedisError:
+        pass
+
+
+def _delete_round_state():
+    try:
+        get_redis().delete(round_state_key())
+    except RedisError:
+        pass
+
+
+def add_claimed_tickets(address_counts):
+    """
+    Count freshly claimed tickets, {address: count}, in the current transaction.
+
+    Bumps `Participant.ticket_count` and the active jackpot's
+    `claimed_ticket_count`, and the snapshot once the claim commits.
+    """
+    address_counts = {address: n for address, n in address_counts.items() if n}
+    total = sum(address_counts.values())
+    if not total:
+        return
+
+    if connection.vendor == "postgresql" and len(address_counts) > 1:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {Participant._meta.db_table} AS p
+                SET ticket_count = p.ticket_count + claimed.count
+                FROM unnest(%s::varchar[], %s::integer[]) AS claimed(address, count)
+                WHERE p.address = claimed.address
+                """,
+                [list(address_counts), list(address_counts.values())],
+            )
+    else:
+        for address, count in address_counts.items():
+            Participant.objects.filter(pk=address).update(
+                ticket_count=F("ticket_count") + count
+            )
+
+    Jackpot.objects.filter(pk__in=active_jackpot_ids()).update(
+        claimed_ticket_count=F("claimed_ticket_count") + total
+    )
+    transaction.on_commit(lambda: _increment_claimed_tickets(total))
+
+
+def active_jackpot_ids():
+    return Jackpot.objects.filter(is_active=True).order_by("-draw_date").values("pk")[:1]
+
+
+def invalidate_round_state():
+    transaction.on_commit(_delete_round_state)
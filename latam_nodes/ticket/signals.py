@@ -1,18 +1,20 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
-from .models import Jackpot, Participant, Ticket
-from .utils import get_node_reward
+from .models import Jackpot
+from .round_state import invalidate_round_state
+from .tasks import setup_jackpot_round
 
 
 @receiver(post_save, sender=Jackpot)
 def create_ticket_from_jackpot(sender, instance, created, **kwargs):
     if created:
-        current_reward = get_node_reward()
-        instance.reward = current_reward
+        # The reward lookup and the table-wide round reset run on a worker,
+        # so the admin save returns at once.
+        transaction.on_commit(lambda: setup_jackpot_round.delay(instance.pk))
 
-        instance.save()
 
-        activated_tickets = Ticket.objects.filter(address__isnull=False)
-        activated_tickets.update(address=None)
-        Participant.objects.update(is_active=False)
+@receiver(post_save, sender=Jackpot)
+def invalidate_round_state_on_jackpot_save(sender, instance, **kwargs):
+    invalidate_round_state()
@@ -0,0 +1,46 @@
+from celery import shared_task
+from django.utils import timezone
+
+from .models import Jackpot
+from .round_state import invalidate_round_state
+from .utils import get_node_reward, start_round
+
+
+def set_setup_state(jackpot_id, status, progress, error=""):
+    # A queryset update: visible to the admin at once and no post_save.
+    Jackpot.objects.filter(pk=jackpot_id).update(
+        setup_status=status,
+        setup_progress=progress,
+        setup_error=error,
+        updated_at=timezone.now(),
+    )
+
+
+@shared_task(name="setup_jackpot_round")
+def setup_jackpot_round(jackpot_id):
+    """
+    Prepare the round of a newly created jackpot: fetch the node reward,
+    build the ticket table for its hash width and reset the round.
+
+    Enqueued by the Jackpot post_save signal once the admin's transaction
+    commits. Progress is written to the jackpot's setup_* fields after each
+    step, outside of any long transaction, so it can be watched live. Until
+    it reads DONE the join endpoint turns claims away.
+    """
+    jackpot = Jackpot.objects.filter(pk=jackpot_id).first()
+    if jackpot is None:
+        return
+
+    set_setup_state(jackpot_id, Jackpot.SetupStatus.RUNNING, 0)
+    try:
+        Jackpot.objects.filter(pk=jackpot_id).update(
+            reward=get_node_reward(), updated_at=timezone.now()
+        )
+        set_setup_state(jackpot_id, Jackpot.SetupStatus.RUNNING, 10)
+
+        start_round(jackpot.ticket_hash_width)
+    except Exception as e:
+        set_setup_state(jackpot_id, Jackpot.SetupStatus.FAILED, 0, str(e))
+        raise
+    set_setup_state(jackpot_id, Jackpot.SetupStatus.DONE, 100)
+    invalidate_round_state()
@@ -0,0 +1,336 @@
+import random
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from latam_nodes.base.fake_chain import FakeChain, make_blocks
+from latam_nodes.delegator.models import Delegator
+
+from .blocks import BlockLookupError, BlockTimeResolver
+from .distribution import apportion, distribute_free_tickets
+from .forms import JackpotForm
+from .models import BlockHeader, Jackpot, Participant, Ticket
+from .permutation import TicketPermutation
+from .round_state import RoundJackpot, add_claimed_tickets, round_state_key
+from .utils import (
+    claim_round_tickets,
+    claim_tickets,
+    pack_ticket_hashes,
+    regenerate_tickets,
+    reset_round,
+    unpack_ticket_hashes,
+)
+
+
+def create_jackpot(**fields):
+    defaults = {
+        "reward": 1000,
+        "reward_percentage": 100,
+        "winning_percentage": 50,
+        "ticket_cost": 1,
+        "ticket_hash_width": 2,
+        "setup_status": Jackpot.SetupStatus.DONE,
+        "setup_progress": 100,
+        "draw_date": timezone.now() + timedelta(days=1),
+    }
+    defaults.update(fields)
+    # bulk_create sends no post_save, so no setup task is enqueued.
+    Jackpot.objects.bulk_create([Jackpot(**defaults)])
+    return Jackpot.objects.latest("draw_date")
+
+
+class ApportionTests(TestCase):
+    def test_sums_to_ticket_count(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            balances = [rng.lognormvariate(3, 2) for _ in range(rng.randint(1, 200))]
+            ticket_count = rng.randint(0, 10000)
+            self.assertEqual(apportion(balances, ticket_count).sum(), ticket_count)
+
+    def test_independent_of_order(self):
+        rng = random.Random(1)
+        balances = [rng.lognormvariate(3, 2) for _ in range(100)]
+        seats = dict(zip(balances, apportion(balances, 1234)))
+        shuffled = balances[:]
+        rng.shuffle(shuffled)
+        self.assertEqual(dict(zip(shuffled, apportion(shuffled, 1234))), seats)
+
+    def test_nothing_to_share(self):
+        self.assertEqual(apportion([0, 0], 10).sum(), 0)
+        self.assertEqual(apportion([1, 2], 0).sum(), 0)
+        self.assertEqual(apportion([], 10).sum(), 0)
+
+
+class DistributeFreeTicketsTests(TestCase):
+    def test_nothing_to_share(self):
+        regenerate_tickets(2)
+        Participant.objects.bulk_create(
+            [
+                Participant(address="celestia1zero", balance=0, is_active=True),
+                Participant(address="celestia1none", balance=None, is_active=True),
+            ]
+        )
+        self.assertEqual(distribute_free_tickets(Participant.objects.all(), 50), 0)
+        self.assertFalse(Ticket.objects.filter(address__isnull=False).exists())
+
+
+class TicketPermutationTests(TestCase):
+    def test_bijection(self):
+        for digits in (1, 2, 3):
+            hashes = list(TicketPermutation(digits))
+            self.assertEqual(len(hashes), 16 ** digits)
+            self.assertEqual(
+                sorted(hashes), [f"{i:0{digits}X}" for i in range(16 ** digits)]
+            )
+
+    def test_position_of_inverts_ticket_at(self):
+        permutation = TicketPermutation(3)
+        for position in range(16 ** 3):
+            ticket = permutation.ticket_at(position)
+            self.assertEqual(permutation.position_of(ticket), position)
+        self.assertEqual(permutation.hash_at(5), f"{permutation.ticket_at(5):03X}")
+
+    def test_key_determines_order(self):
+        key = b"k" * 16
+        self.assertEqual(list(TicketPermutation(3, key)), list(TicketPermutation(3, key)))
+        self.assertNotEqual(
+            list(TicketPermutation(3, key)), list(TicketPermutation(3, b"x" * 16))
+        )
+
+
+class PackedTicketsTests(TestCase):
+    def test_round_trip(self):
+        rng = random.Random(2)
+        for digits in (1, 4, 6):
+            hashes = [
+                f"{value:0{digits}X}"
+                for value in rng.sample(range(16 ** digits), min(300, 16 ** digits))
+            ]
+            packed = pack_ticket_hashes(hashes)
+            self.assertEqual(unpack_ticket_hashes(packed, digits), sorted(hashes))
+        self.assertEqual(unpack_ticket_hashes(pack_ticket_hashes([]), 6), [])
+
+
+class RoundJackpotTests(TestCase):
+    def test_round_trip(self):
+        jackpot = RoundJackpot.from_jackpot(create_jackpot(ticket_cost=None))
+        self.assertEqual(RoundJackpot.loads(jackpot.dumps()), jackpot)
+        self.assertIsNone(jackpot.ticket_cost)
+        self.assertEqual(jackpot.winning_percentage, 50)
+
+
+class JackpotFormTests(TestCase):
+    def form(self, ticket_hash_width):
+        return JackpotForm(
+            data={
+                "reward": 1000,
+                "reward_percentage": 100,
+                "winning_percentage": 50,
+                "start_distribute_time": 120,
+                "ticket_cost": 1,
+                "ticket_hash_width": ticket_hash_width,
+                "draw_date": timezone.now() + timedelta(days=1),
+            }
+        )
+
+    def test_minimum_cost_uses_the_new_width(self):
+        Delegator.objects.create(address="celestia1test", balance=4096)
+        # 4096 / 16**2 = 16 per ticket, 4096 / 16**3 = 1.
+        regenerate_tickets(3)
+        self.assertIn("ticket_cost", self.form(2).errors)
+        regenerate_tickets(2)
+        self.assertTrue(self.form(3).is_valid(), self.form(3).errors)
+
+
+class RoundStateKeyTests(TestCase):
+    def test_claims_only_bump_this_databases_snapshot(self):
+        redis = mock.MagicMock()
+        with mock.patch("latam_nodes.ticket.round_state.get_redis", return_value=redis):
+            with self.captureOnCommitCallbacks(execute=True):
+                add_claimed_tickets({"celestia1test": 3})
+            with mock.patch.dict(connection.settings_dict, NAME="db_loteria_latam_nodes"):
+                live_key = round_state_key()
+        key, field, count = redis.eval.call_args.args[2:]
+        self.assertEqual((field, count), ("claimed_tickets", 3))
+        self.assertEqual(key, round_state_key())
+        self.assertNotEqual(key, live_key)
+
+
+class RoundSetupTests(TestCase):
+    def test_join_refused_until_setup_is_done(self):
+        create_jackpot(setup_status=Jackpot.SetupStatus.RUNNING, setup_progress=10)
+        response = self.client.post(
+            reverse("check-update-address"), {"address": "celestia1test"}
+        )
+        self.assertEqual(response.status_code, 503)
+
+    def test_claims_stop_at_round_capacity(self):
+        # 50% of the 256 tickets at width 2.
+        jackpot = create_jackpot()
+        regenerate_tickets(2)
+        participants = Participant.objects.bulk_create(
+            Participant(address=f"celestia1test{i}", balance=1) for i in range(3)
+        )
+        self.assertEqual(len(claim_round_tickets(participants[0], 100)), 100)
+        self.assertEqual(len(claim_round_tickets(participants[1], 100)), 28)
+        self.assertEqual(claim_round_tickets(participants[2], 1), [])
+        jackpot.refresh_from_db()
+        self.assertEqual(jackpot.claimed_ticket_count, 128)
+        self.assertEqual(Ticket.objects.filter(address__isnull=False).count(), 128)
+
+    def test_no_claims_before_setup(self):
+        create_jackpot(setup_status=Jackpot.SetupStatus.RUNNING)
+        regenerate_tickets(2)
+        participant = Participant.objects.create(address="celestia1test", balance=1)
+        self.assertEqual(claim_round_tickets(participant, 10), [])
+
+    def test_summary_before_setup(self):
+        create_jackpot(reward=None, setup_status=Jackpot.SetupStatus.PENDING)
+        response = self.client.get(reverse("summary"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["latest_jackpot_amount"], "No jackpot available"
+        )
+
+    def test_reset_round_deals_new_positions(self):
+        regenerate_tickets(2)
+        before = dict(Ticket.objects.values_list("hash", "position"))
+        reset_round()
+        after = dict(Ticket.objects.values_list("hash", "position"))
+        self.assertEqual(sorted(after.values()), list(range(16 ** 2)))
+        self.assertNotEqual(after, before)
+
+    def test_reset_round_zeroes_claimed_tickets(self):
+        jackpot = create_jackpot(claimed_ticket_count=7)
+        regenerate_tickets(1)
+        reset_round()
+        jackpot.refresh_from_db()
+        self.assertEqual(jackpot.claimed_ticket_count, 0)
+
+
+@skipUnless(connection.vendor == "postgresql", "raw SQL paths run on PostgreSQL only")
+class PostgreSQLRoundTests(TestCase):
+    def setUp(self):
+        self.jackpot = create_jackpot()
+        regenerate_tickets(2)
+        self.participants = Participant.objects.bulk_create(
+            Participant(address=f"celestia1test{i}", balance=i + 1, is_active=True)
+            for i in range(5)
+        )
+
+    def assertCountersMatch(self):
+        for participant in Participant.objects.all():
+            self.assertEqual(
+                participant.ticket_count,
+                Ticket.objects.filter(address=participant).count(),
+            )
+        self.jackpot.refresh_from_db()
+        self.assertEqual(
+            self.jackpot.claimed_ticket_count,
+            Ticket.objects.filter(address__isnull=False).count(),
+        )
+
+    def test_regenerate_tickets(self):
+        self.assertEqual(regenerate_tickets(3), 16 ** 3)
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("hash", flat=True)),
+            [f"{i:03X}" for i in range(16 ** 3)],
+        )
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("position", flat=True)),
+            list(range(16 ** 3)),
+        )
+
+    def test_claim_tickets_takes_lowest_free_positions(self):
+        expected = list(
+            Ticket.objects.order_by("position").values_list("hash", flat=True)[:10]
+        )
+        hashes = claim_tickets(self.participants[0], 10)
+        self.assertEqual(sorted(hashes), sorted(expected))
+        self.assertEqual(
+            Ticket.objects.filter(address=self.participants[0]).count(), 10
+        )
+
+        more = claim_tickets(self.participants[1], 1000)
+        self.assertEqual(len(more), 16 ** 2 - 10)
+        self.assertFalse(set(hashes) & set(more))
+        self.assertEqual(claim_tickets(self.participants[2], 1), [])
+        self.assertCountersMatch()
+
+    def test_distribute_free_tickets(self):
+        claim_tickets(self.participants[0], 6)
+        assigned = distribute_free_tickets(Participant.objects.all(), 100)
+        self.assertEqual(assigned, 100)
+        self.assertEqual(Ticket.objects.filter(address__isnull=False).count(), 106)
+        seats = apportion([participant.balance for participant in self.participants], 100)
+        for participant, count in zip(self.participants, seats):
+            claimed = 6 if participant == self.participants[0] else 0
+            self.assertEqual(
+                Ticket.objects.filter(address=participant).count(), count + claimed
+            )
+        self.assertCountersMatch()
+
+    def test_reset_round(self):
+        claim_tickets(self.participants[0], 20)
+        reset_round()
+        self.assertFalse(Ticket.objects.filter(address__isnull=False).exists())
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("position", flat=True)),
+            list(range(16 ** 2)),
+        )
+        self.assertFalse(Participant.objects.filter(is_active=True).exists())
+        self.assertFalse(Participant.objects.exclude(ticket_count=0).exists())
+
+
+class UnavailableChain(FakeChain):
+    def route(self, path, params):
+        return 503, {"error": "unavailable"}
+
+
+class BlockTimeResolverTests(TestCase):
+    def setUp(self):
+        self.blocks = make_blocks(3000, jitter=3.0, seed=7)
+
+    def resolve(self, chain, target_time, urls=1):
+        with chain, override_settings(CELESTIA_RPC_URLS=[chain.url] * urls):
+            return BlockTimeResolver().find_closest(target_time)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        first, last = self.blocks[0]["time"], self.blocks[-1]["time"]
+        span = (last - first).total_seconds()
+        targets = [first - timedelta(hours=1), last + timedelta(hours=1)] + [
+            first + timedelta(seconds=rng.uniform(0, span)) for _ in range(20)
+        ]
+        for target_time in targets:
+            expected = min(
+                self.blocks,
+                key=lambda block: abs((block["time"] - target_time).total_seconds()),
+            )
+            block = self.resolve(FakeChain(blocks=self.blocks), target_time)
+            self.assertEqual(block.height, expected["height"], target_time)
+            self.assertEqual(block.hash, expected["hash"])
+
+    def test_lookup_error_after_bounded_retries(self):
+        chain = UnavailableChain(blocks=self.blocks)
+        with self.assertRaises(BlockLookupError):
+            self.resolve(chain, self.blocks[100]["time"], urls=2)
+        # Each endpoint is tried once plus its retries, then the lookup fails.
+        self.assertEqual(chain.request_count, 2 * (settings.CHAIN_MAX_RETRIES + 1))
+
+    def test_cached_bracket_needs_no_requests(self):
+        low, high = self.blocks[1000], self.blocks[1001]
+        BlockHeader.objects.bulk_create(
+            BlockHeader(height=block["height"], hash=block["hash"], time=block["time"])
+            for block in (low, high)
+        )
+        chain = FakeChain(blocks=self.blocks)
+        block = self.resolve(chain, high["time"] - timedelta(seconds=0.1))
+        self.assertEqual(block.height, high["height"])
+        self.assertEqual(chain.request_count, 0)
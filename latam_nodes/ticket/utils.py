@@ -1,15 +1,32 @@
-from .models import Ticket
+import base64
+import logging
+import zlib
+from itertools import groupby, islice
+from operator import itemgetter
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Jackpot, Participant, RoundAllocation, Ticket
+from .permutation import TicketPermutation
+from .round_state import (
+    active_jackpot_ids,
+    add_claimed_tickets,
+    invalidate_round_state,
+)
 import random
 import string
 
-import requests
+from latam_nodes.base.chain import get_validator_commission
+
+logger = logging.getLogger(__name__)
 
 
 def get_node_reward():
     try:
-        url = "https://api-celestia.mzonder.com/cosmos/distribution/v1beta1/validators/celestiavaloper14v4ush42xewyeuuldf6jtdz0a7pxg5fwrlumwf/commission"
-        response = requests.get(url)
-        data = response.json()
+        data = get_validator_commission()
 
         rewards = data.get("commission").get("commission")
         # return value that denom is utia
@@ -17,8 +34,8 @@ def get_node_reward():
             float(next(item["amount"] for item in rewards if item["denom"] == "utia"))
             / 1e6
         )
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("Could not fetch the node reward")
         return 0
 
 
@@ -37,9 +54,363 @@ def generate_hex_hash(digits=4):
 
     return hex_hashes
 
+
+def iter_ticket_hashes(digits=None, key=None):
+    """
+    Lazily yield the whole 16**digits hex space in a keyed shuffled order.
+
+    Unlike generate_hex_hash no list of the space is built, so the memory
+    used is the same for 65,536 and 16,777,216 tickets.
+    """
+    return iter(TicketPermutation(digits or settings.TICKET_HASH_WIDTH, key))
+
+
+def get_ticket_hash_width(jackpot=None):
+    """Hash width of `jackpot`, else of the latest active one, else the default."""
+    if jackpot is None:
+        jackpot = Jackpot.objects.filter(is_active=True).order_by("-draw_date").first()
+    if jackpot is None:
+        return settings.TICKET_HASH_WIDTH
+    return jackpot.ticket_hash_width
+
+
+def format_ticket_hash(value, digits=4):
+    return f"{value:0{digits}X}"
+
+
+def ticket_hash_from_block_hash(block_hash, digits=None):
+    """
+    Map a block hash to the ticket hash it draws.
+
+    The low `digits` hex digits of the block hash are rendered in the ticket
+    format (upper case, zero padded), so the winner is an exact primary-key
+    lookup instead of a LIKE '%XXXX' scan.
+    """
+    digits = digits or settings.TICKET_HASH_WIDTH
+    return format_ticket_hash(int(block_hash, 16) % 16 ** digits, digits)
+
+
+def ticket_bitmap_bytes(hashes, digits):
+    bits = np.zeros(16 ** digits, dtype=bool)
+    bits[[int(ticket_hash, 16) for ticket_hash in hashes]] = True
+    return np.packbits(bits).tobytes()
+
+
+def ticket_hashes_from_bitmap_bytes(data, digits):
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    return [format_ticket_hash(int(value), digits) for value in np.flatnonzero(bits)]
+
+
+def encode_ticket_bitmap(hashes, digits=None):
+    """
+    Base64 bitmap over the 16**digits ticket space.
+
+    Bit i, most significant bit first within each byte, is set when ticket
+    `format_ticket_hash(i)` is among `hashes`.
+    """
+    digits = digits or settings.TICKET_HASH_WIDTH
+    return base64.b64encode(ticket_bitmap_bytes(hashes, digits)).decode()
+
+
+def decode_ticket_bitmap(bitmap, digits=None):
+    digits = digits or settings.TICKET_HASH_WIDTH
+    return ticket_hashes_from_bitmap_bytes(base64.b64decode(bitmap), digits)
+
+
+def pack_ticket_hashes(hashes):
+    """
+    Tickets as stored in RoundAllocation: the sorted ticket values, delta
+    encoded as little-endian uint32 and zlib-compressed.
+
+    The cost depends only on the number of tickets, not on the 16**digits
+    ticket space a bitmap would span.
+    """
+    values = np.sort(
+        np.fromiter((int(ticket_hash, 16) for ticket_hash in hashes), dtype=np.int64)
+    )
+    return zlib.compress(np.diff(values, prepend=0).astype("<u4").tobytes())
+
+
+def unpack_ticket_hashes(data, digits):
+    values = np.cumsum(np.frombuffer(zlib.decompress(data), dtype="<u4"), dtype=np.int64)
+    return [format_ticket_hash(int(value), digits) for value in values]
+
+
+def encode_ticket_ranges(hashes):
+    """Collapse ticket hashes into sorted [start, length] runs of consecutive values."""
+    ranges = []
+    for value in sorted(int(ticket_hash, 16) for ticket_hash in hashes):
+        if ranges and ranges[-1][0] + ranges[-1][1] == value:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([value, 1])
+    return ranges
+
+
 def get_total_ticket_count():
     try:
         return Ticket.objects.count()
     
     except Ticket.DoesNotExist:
-        return 0
\ No newline at end of file
+        return 0
+
+
+def get_free_ticket_pool():
+    """
+    Unassigned tickets in the round's shuffled order.
+
+    `position` is shuffled once per round, so taking the first N rows is an
+    index range scan instead of sorting the whole table with ORDER BY random().
+    """
+    return Ticket.objects.filter(address__isnull=True).order_by("position")
+
+
+def claim_tickets(participant, count):
+    """
+    Assign up to `count` free tickets to `participant` and return their hashes.
+
+    On PostgreSQL this is a single UPDATE over a SKIP LOCKED sub-select, so
+    concurrent joins never wait on each other's rows and no Ticket instances
+    are built in Python.
+    """
+    if count <= 0:
+        return []
+
+    address = getattr(participant, "pk", participant)
+    if connection.vendor == "postgresql":
+        table = Ticket._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} SET address_id = %s, updated_at = %s
+                WHERE hash IN (
+                    SELECT hash FROM {table}
+                    WHERE address_id IS NULL
+                    ORDER BY position
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING hash
+                """,
+                [address, timezone.now(), count],
+            )
+            hashes = [row[0] for row in cursor.fetchall()]
+            add_claimed_tickets({address: len(hashes)})
+            return hashes
+
+    with transaction.atomic():
+        hashes = list(
+            get_free_ticket_pool()
+            .select_for_update(skip_locked=True)
+            .values_list("hash", flat=True)[:count]
+        )
+        Ticket.objects.filter(hash__in=hashes).update(
+            address_id=address, updated_at=timezone.now()
+        )
+        add_claimed_tickets({address: len(hashes)})
+    return hashes
+
+
+def claim_round_tickets(participant, count):
+    """
+    Claim up to `count` tickets for `participant` within the active round's
+    capacity: `winning_percentage` of its 16**ticket_hash_width tickets.
+
+    The cap is checked against Jackpot.claimed_ticket_count with the jackpot
+    row locked until the claim commits, so concurrent joins cannot overshoot
+    it. The Redis snapshot can lag behind and is not consulted.
+    """
+    with transaction.atomic():
+        jackpot = (
+            Jackpot.objects.select_for_update()
+            .filter(pk__in=active_jackpot_ids(), setup_status=Jackpot.SetupStatus.DONE)
+            .first()
+        )
+        if jackpot is None:
+            return []
+        capacity = int(
+            16 ** jackpot.ticket_hash_width * jackpot.winning_percentage // 100
+        )
+        remaining = capacity - jackpot.claimed_ticket_count
+        return claim_tickets(participant, min(count, remaining))
+
+
+def shuffle_ticket_pool():
+    """
+    Deal every ticket a new random position for the next round.
+
+    Elsewhere than on PostgreSQL the positions come from a freshly keyed
+    TicketPermutation: each ticket's position is computed from its hash, and
+    the hashes are read and rewritten in batches, so the ticket space is
+    never held in memory.
+    """
+    if connection.vendor == "postgresql":
+        table = Ticket._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS t SET position = s.position
+                FROM (
+                    SELECT hash, row_number() OVER (ORDER BY random()) - 1 AS position
+                    FROM {table}
+                ) AS s
+                WHERE t.hash = s.hash
+                """
+            )
+        return
+
+    first_hash = Ticket.objects.values_list("hash", flat=True).first()
+    if first_hash is None:
+        return
+    permutation = TicketPermutation(len(first_hash))
+    table = Ticket._meta.db_table
+    batch_size = 5000
+    hashes = Ticket.objects.order_by("hash").values_list("hash", flat=True)
+    batch = list(hashes[:batch_size])
+    with connection.cursor() as cursor:
+        while batch:
+            # Plain per-row UPDATEs: bulk_update's CASE WHEN grows with the batch.
+            cursor.executemany(
+                f"UPDATE {table} SET position = %s WHERE hash = %s",
+                [(permutation.position_of(int(hash, 16)), hash) for hash in batch],
+            )
+            batch = list(hashes.filter(hash__gt=batch[-1])[:batch_size])
+
+
+def reset_round(shuffle=True):
+    """
+    Free every ticket, deal new positions, deactivate all participants and
+    zero the active jackpot's claimed_ticket_count, as one transaction.
+    `shuffle=False` keeps the positions of a ticket table that was just
+    regenerated, and so is already shuffled.
+
+    The ticket rows are kept between rounds. On PostgreSQL clearing
+    address_id and reshuffling position is a single UPDATE, so each row is
+    rewritten once per round.
+    """
+    with transaction.atomic():
+        if shuffle and connection.vendor == "postgresql":
+            table = Ticket._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} AS t
+                    SET address_id = NULL, position = s.position, updated_at = now()
+                    FROM (
+                        SELECT hash, row_number() OVER (ORDER BY random()) - 1 AS position
+                        FROM {table}
+                    ) AS s
+                    WHERE t.hash = s.hash
+                    """
+                )
+        else:
+            Ticket.objects.filter(address__isnull=False).update(address=None)
+            if shuffle:
+                shuffle_ticket_pool()
+        Participant.objects.update(is_active=False, ticket_count=0)
+        Jackpot.objects.filter(is_active=True).update(claimed_ticket_count=0)
+        transaction.on_commit(invalidate_round_state)
+
+
+def regenerate_tickets(digits=None):
+    """
+    Replace the ticket table with the full 16**digits hex space, shuffled.
+
+    On PostgreSQL the rows are produced by generate_series inside one
+    TRUNCATE + INSERT ... SELECT, so no ticket ever passes through Python.
+    Elsewhere they are streamed from iter_ticket_hashes in batches.
+    Returns the number of tickets created.
+    """
+    digits = digits or settings.TICKET_HASH_WIDTH
+    if connection.vendor == "postgresql":
+        table = Ticket._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {table}")
+            cursor.execute(
+                f"""
+                INSERT INTO {table}
+                    (hash, position, address_id, is_active, created_at, updated_at)
+                SELECT upper(lpad(to_hex(n), %s, '0')),
+                       row_number() OVER (ORDER BY random()) - 1,
+                       NULL, true, now(), now()
+                FROM generate_series(0, %s - 1) AS n
+                """,
+                [digits, 16 ** digits],
+            )
+            return cursor.rowcount
+
+    batch_size = 5000
+    created = 0
+    table = Ticket._meta.db_table
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    tickets = enumerate(iter_ticket_hashes(digits))
+    with transaction.atomic(), connection.cursor() as cursor:
+        Ticket.objects.all().delete()
+        # Raw INSERTs in slices: a Ticket instance per row costs more than the
+        # row itself, and bulk_create would materialize the whole generator.
+        batch = list(islice(tickets, batch_size))
+        while batch:
+            cursor.executemany(
+                f"""
+                INSERT INTO {table}
+                    (hash, position, address_id, is_active, created_at, updated_at)
+                VALUES (%s, %s, NULL, %s, %s, %s)
+                """,
+                [(hash, position, True, now, now) for position, hash in batch],
+            )
+            created += len(batch)
+            batch = list(islice(tickets, batch_size))
+    return created
+
+
+def start_round(digits=None):
+    """
+    Prepare the ticket table for a round with `digits`-wide ticket hashes.
+
+    The rows are kept between rounds and only rebuilt when the width
+    changes, e.g. when a jackpot uses a larger ticket space than the last.
+    """
+    digits = digits or settings.TICKET_HASH_WIDTH
+    with transaction.atomic():
+        regenerated = Ticket.objects.count() != 16 ** digits
+        if regenerated:
+            regenerate_tickets(digits)
+        reset_round(shuffle=not regenerated)
+
+
+def snapshot_round_allocations(jackpot):
+    """
+    Record who held which tickets in `jackpot`'s round, one RoundAllocation
+    per holder, before reset_round() clears the ticket table.
+
+    Tickets are streamed in (address, hash) order, which
+    ticket_address_hash_idx serves, and written with bulk inserts. Running it
+    twice for a round is a no-op. Returns the number of holders.
+    """
+    digits = jackpot.ticket_hash_width
+    rows = (
+        Ticket.objects.filter(address__isnull=False)
+        .order_by("address", "hash")
+        .values_list("address", "hash")
+        .iterator(chunk_size=10000)
+    )
+
+    def allocations():
+        for address, group in groupby(rows, key=itemgetter(0)):
+            hashes = [hash for _, hash in group]
+            yield RoundAllocation(
+                jackpot=jackpot,
+                participant_address=address,
+                ticket_count=len(hashes),
+                digits=digits,
+                packed_tickets=pack_ticket_hashes(hashes),
+            )
+
+    holders = 0
+    pending = allocations()
+    batch = list(islice(pending, 500))
+    while batch:
+        RoundAllocation.objects.bulk_create(batch, ignore_conflicts=True)
+        holders += len(batch)
+        batch = list(islice(pending, 500))
+    return holders
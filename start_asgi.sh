@@ -0,0 +1,7 @@
+source .venv/bin/activate;
+# The uvicorn workers share their Prometheus samples through this directory;
+# it must start empty. /metrics also serves the Celery workers' samples.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/latam-nodes-metrics/web}
+export METRICS_DIRS=${METRICS_DIRS:-/tmp/latam-nodes-metrics/celery}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+uvicorn config.asgi:application --host 127.0.0.1 --port 8000 --workers ${WEB_CONCURRENCY:-2}